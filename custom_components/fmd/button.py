@@ -3,27 +3,201 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
-import io
 import logging
 import os
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 # Import Device class for v2.0.4+ API
-from fmd_api import AuthenticationError, Device, FmdApiException, OperationError
+from fmd_api import (
+    AuthenticationError,
+    Device,
+    FmdApiException,
+    FmdClient,
+    OperationError,
+)
+from fmd_api.helpers import b64_decode_padded
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from PIL import Image
 
-from .const import DOMAIN
+from .const import DOMAIN, LOCATION_REQUEST_WAIT, MEDIA_ROOT
+from .exif import read_exif_text_tags
 
 _LOGGER = logging.getLogger(__name__)
 
+# Bytes of an encrypted picture blob that go into its in-memory fingerprint
+_BLOB_FINGERPRINT_BYTES = 65536
+
+# Most recently named photos whose EXIF timestamps stay memoized
+_EXIF_CACHE_SIZE = 256
+
+
+def _blob_hash(blob: Any) -> str:
+    """Return a quick fingerprint for an encrypted picture blob.
+
+    Only kept in memory, so a fast non-SHA-2 digest is fine here. Encrypted
+    blobs start with a randomized key/IV header, so the length plus the first
+    64 KiB identify a blob without hashing the whole payload.
+    """
+    if not isinstance(blob, bytes):
+        blob = str(blob)
+    head = blob[:_BLOB_FINGERPRINT_BYTES]
+    if isinstance(head, str):
+        head = head.encode("utf-8")
+    digest = hashlib.blake2b(head, digest_size=8)
+    digest.update(len(blob).to_bytes(8, "little"))
+    return digest.hexdigest()
+
+
+def _photo_content_hash(image_bytes: bytes) -> str:
+    """Return the 8-character content tag used in saved photo filenames.
+
+    Must stay stable across releases: duplicate detection matches photos
+    already on disk by this tag.
+    """
+    return hashlib.sha256(image_bytes).hexdigest()[:8]
+
+
+def _decode_picture(client: FmdClient, picture_blob: Any) -> bytes:
+    """Decrypt and decode a picture blob into image bytes.
+
+    Mirrors Device.decode_picture, which runs the CPU-bound decryption
+    synchronously inside its coroutine, so the download button calls this in
+    the executor instead.
+    """
+    decrypted = client.decrypt_data_blob(picture_blob)
+    try:
+        image_bytes = b64_decode_padded(decrypted.decode("utf-8").strip())
+    except Exception as e:
+        raise OperationError(f"Failed to decode picture blob: {e}") from e
+    # The server sends no capture time. Unlike fmd_api's PhotoResult, no
+    # download time is attached, so the filename comes from EXIF or the
+    # content hash, which stay the same across downloads and restarts.
+    return image_bytes
+
+
+def _photo_filename(
+    idx: int, image_bytes: bytes, exif_cache: OrderedDict[str, str | None]
+) -> str:
+    """Build the filename for a decoded photo.
+
+    Hashes the image and reads its EXIF timestamp, both CPU-bound, so this
+    runs in the executor. EXIF results are memoized in exif_cache by content
+    hash, keeping only the _EXIF_CACHE_SIZE most recently used.
+    """
+    # Generate content hash for duplicate detection
+    content_hash = _photo_content_hash(image_bytes)
+    _LOGGER.debug("Photo %s: Content hash = %s", idx + 1, content_hash)
+
+    # Extract the EXIF timestamp; parsing is skipped for known content
+    if content_hash in exif_cache:
+        exif_cache.move_to_end(content_hash)
+        timestamp_str = exif_cache[content_hash]
+        _LOGGER.debug(
+            "Photo %s: Using cached EXIF timestamp: %s", idx + 1, timestamp_str
+        )
+    else:
+        timestamp_str = _exif_timestamp(idx, image_bytes)
+        exif_cache[content_hash] = timestamp_str
+        if len(exif_cache) > _EXIF_CACHE_SIZE:
+            exif_cache.popitem(last=False)
+
+    # Generate filename with timestamp if available, otherwise hash-only
+    if timestamp_str:
+        filename = f"photo_{timestamp_str}_{content_hash}.jpg"
+    else:
+        filename = f"photo_{content_hash}.jpg"
+
+    _LOGGER.debug("Photo %s: Generated filename: %s", idx + 1, filename)
+    return filename
+
+
+def _exif_timestamp(idx: int, image_bytes: bytes) -> str | None:
+    """Return the photo's EXIF capture time as YYYYmmdd_HHMMSS, if present."""
+    timestamp_str = None
+    try:
+        # Read the text tags straight from the EXIF header (no image decode)
+        exif_data = read_exif_text_tags(image_bytes)
+
+        if exif_data:
+            _LOGGER.debug(
+                "Photo %s: EXIF data found with %s tags",
+                idx + 1,
+                len(exif_data),
+            )
+
+            # Try multiple timestamp tags in order of preference
+            # 36867 = DateTimeOriginal (when photo was taken)
+            # 36868 = DateTimeDigitized (when photo was digitized)
+            # 306 = DateTime (last modification time)
+            datetime_value = None
+            tag_used = None
+
+            for tag_id, tag_name in [
+                (36867, "DateTimeOriginal"),
+                (36868, "DateTimeDigitized"),
+                (306, "DateTime"),
+            ]:
+                datetime_value = exif_data.get(tag_id)
+                if datetime_value:
+                    tag_used = tag_name
+                    _LOGGER.debug(
+                        "Photo %s: Found %s tag with value: %s",
+                        idx + 1,
+                        tag_name,
+                        datetime_value,
+                    )
+                    break
+
+            if datetime_value:
+                # Parse EXIF datetime format: "2025:10:19 15:00:34"
+                # Strip any extra whitespace or null bytes
+                datetime_clean = str(datetime_value).strip().rstrip("\x00")
+                dt = datetime.strptime(datetime_clean, "%Y:%m:%d %H:%M:%S")
+                timestamp_str = dt.strftime("%Y%m%d_%H%M%S")
+                _LOGGER.info(
+                    "Photo %s: Extracted EXIF timestamp from %s: %s",
+                    idx + 1,
+                    tag_used,
+                    timestamp_str,
+                )
+            else:
+                _LOGGER.warning(
+                    "Photo %s: No timestamp tags found in EXIF "
+                    "(tried 36867, 36868, 306)",
+                    idx + 1,
+                )
+        else:
+            _LOGGER.warning("Photo %s: No EXIF data found in image", idx + 1)
+    except Exception as e:
+        _LOGGER.warning(
+            "Photo %s: Could not extract EXIF timestamp: %s",
+            idx + 1,
+            e,
+            exc_info=True,
+        )
+    return timestamp_str
+
+
+def _scan_photo_names(media_dir: Path) -> set[str]:
+    """Return the names of files already present in the media directory."""
+    try:
+        with os.scandir(media_dir) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
+
+
+def _photos_oldest_first(media_dir: Path) -> list[Path]:
+    """Return the JPEGs in the media directory, oldest modification time first."""
+    return sorted(media_dir.glob("*.jpg"), key=lambda p: p.stat().st_mtime)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -115,12 +289,13 @@ class FmdLocationUpdateButton(ButtonEntity):
 
             if success:
                 _LOGGER.info(
-                    "Location request sent successfully. Waiting 10 seconds "
-                    "for device to respond..."
+                    "Location request sent successfully. Waiting %s seconds "
+                    "for device to respond...",
+                    LOCATION_REQUEST_WAIT,
                 )
 
-                # Wait 10 seconds for the device to capture and upload the location
-                await asyncio.sleep(10)
+                # Wait for the device to capture and upload the location
+                await asyncio.sleep(LOCATION_REQUEST_WAIT)
 
                 # Fetch the latest location data from the server
                 _LOGGER.info("Fetching updated location from server...")
@@ -392,6 +567,17 @@ class FmdDownloadPhotosButton(ButtonEntity):
         self._entry = entry
         self._attr_unique_id = f"{entry.entry_id}_download_photos"
         self._attr_name = "Photo: Download"
+        # Encrypted blob hash -> saved filename, so repeat downloads skip decryption.
+        # Kept in hass.data so it is shared for the lifetime of the config entry.
+        self._known_blobs: dict[str, str] = hass.data[DOMAIN][
+            entry.entry_id
+        ].setdefault("known_photo_blobs", {})
+        # Photo content hash -> EXIF timestamp, so re-downloads skip EXIF parsing
+        self._exif_timestamps: OrderedDict[str, str | None] = hass.data[DOMAIN][
+            entry.entry_id
+        ].setdefault("exif_timestamps", OrderedDict())
+        # (media_dir, mtime_ns) -> file names from the last directory scan
+        self._listing: tuple[tuple[str, int], frozenset[str]] | None = None
 
     @property
     def device_info(self) -> dict[str, Any]:
@@ -441,165 +627,31 @@ class FmdDownloadPhotosButton(ButtonEntity):
             )
 
             # Create media directory with device-specific subdirectory
-            # Use /media for Docker/Core installations, falls back to config/media for HAOS
             try:
-                media_base = Path("/media")
-                if (
-                    not media_base.exists()
-                    or not media_base.is_dir()
-                    or not os.access(media_base, os.W_OK)
-                ):
-                    # Fall back to config/media for Home Assistant OS
-                    media_base = Path(self.hass.config.path("media"))
-
-                # Use device ID for subdirectory to separate photos from multiple devices
-                device_id = self._entry.data["id"]
-                media_dir = media_base / "fmd" / device_id
-                media_dir.mkdir(parents=True, exist_ok=True)
+                media_dir, existing = await self.hass.async_add_executor_job(
+                    self._prepare_media_dir
+                )
                 _LOGGER.info("Saving photos to: %s", media_dir)
             except Exception as e:
                 _LOGGER.error("Failed to create media directory: %s", e)
                 return
 
-            # Download and save each photo
-            successful_downloads = 0
-            skipped_duplicates = 0
-
             _LOGGER.info("Processing %s photo(s)...", len(picture_blobs))
 
-            for idx, blob in enumerate(picture_blobs):
-                try:
-                    _LOGGER.debug("Processing photo %s/%s", idx + 1, len(picture_blobs))
-
-                    # Decode the photo using new API (replaces decrypt + base64 decode)
-                    photo_result = await device.decode_picture(blob)
-                    image_bytes = photo_result.data
+            # Skip decryption entirely for blobs that were already saved
+            pending = self._dedup(picture_blobs, existing)
 
-                    _LOGGER.debug(
-                        "Photo %s: Decoded, size = %s bytes, MIME type = %s",
-                        idx + 1,
-                        len(image_bytes),
-                        photo_result.mime_type,
-                    )
-
-                    # Generate content hash for duplicate detection
-                    content_hash = hashlib.sha256(image_bytes).hexdigest()[:8]
-                    _LOGGER.debug("Photo %s: Content hash = %s", idx + 1, content_hash)
-
-                    # Try to extract EXIF timestamp (prefer PhotoResult timestamp if available)
-                    timestamp_str = None
-
-                    # First, check if PhotoResult has a timestamp
-                    if photo_result.timestamp:
-                        timestamp_str = photo_result.timestamp.strftime("%Y%m%d_%H%M%S")
-                        _LOGGER.info(
-                            "Photo %s: Using timestamp from PhotoResult: %s",
-                            idx + 1,
-                            timestamp_str,
-                        )
-                    else:
-                        # Fall back to EXIF extraction
-                        try:
-                            img = Image.open(io.BytesIO(image_bytes))
-
-                            # Try to get EXIF data using getexif() (newer method)
-                            exif_data = img.getexif()
-
-                            if exif_data:
-                                _LOGGER.debug(
-                                    "Photo %s: EXIF data found with %s tags",
-                                    idx + 1,
-                                    len(exif_data),
-                                )
-
-                                # Try multiple timestamp tags in order of preference
-                                # 36867 = DateTimeOriginal (when photo was taken)
-                                # 36868 = DateTimeDigitized (when photo was digitized)
-                                # 306 = DateTime (last modification time)
-                                datetime_value = None
-                                tag_used = None
-
-                                for tag_id, tag_name in [
-                                    (36867, "DateTimeOriginal"),
-                                    (36868, "DateTimeDigitized"),
-                                    (306, "DateTime"),
-                                ]:
-                                    datetime_value = exif_data.get(tag_id)
-                                    if datetime_value:
-                                        tag_used = tag_name
-                                        _LOGGER.debug(
-                                            "Photo %s: Found %s tag with value: %s",
-                                            idx + 1,
-                                            tag_name,
-                                            datetime_value,
-                                        )
-                                        break
-
-                                if datetime_value:
-                                    # Parse EXIF datetime format: "2025:10:19 15:00:34"
-                                    # Strip any extra whitespace or null bytes
-                                    datetime_clean = (
-                                        str(datetime_value).strip().rstrip("\x00")
-                                    )
-                                    dt = datetime.strptime(
-                                        datetime_clean, "%Y:%m:%d %H:%M:%S"
-                                    )
-                                    timestamp_str = dt.strftime("%Y%m%d_%H%M%S")
-                                    _LOGGER.info(
-                                        "Photo %s: Extracted EXIF timestamp from %s: %s",
-                                        idx + 1,
-                                        tag_used,
-                                        timestamp_str,
-                                    )
-                                else:
-                                    _LOGGER.warning(
-                                        "Photo %s: No timestamp tags found in EXIF "
-                                        "(tried 36867, 36868, 306)",
-                                        idx + 1,
-                                    )
-                            else:
-                                _LOGGER.warning(
-                                    "Photo %s: No EXIF data found in image", idx + 1
-                                )
-                        except Exception as e:
-                            _LOGGER.warning(
-                                "Photo %s: Could not extract EXIF timestamp: %s",
-                                idx + 1,
-                                e,
-                                exc_info=True,
-                            )
-
-                    # Generate filename with timestamp if available, otherwise hash-only
-                    if timestamp_str:
-                        filename = f"photo_{timestamp_str}_{content_hash}.jpg"
-                    else:
-                        filename = f"photo_{content_hash}.jpg"
-
-                    filepath = media_dir / filename
-
-                    _LOGGER.debug("Photo %s: Generated filename: %s", idx + 1, filename)
-
-                    # Skip if file already exists (duplicate)
-                    if filepath.exists():
-                        _LOGGER.info(
-                            "Photo %s: Skipping duplicate (file exists): %s",
-                            idx + 1,
-                            filename,
-                        )
-                        skipped_duplicates += 1
-                        continue
-
-                    # Save to file (use executor to avoid blocking I/O)
-                    await self.hass.async_add_executor_job(
-                        filepath.write_bytes, image_bytes
-                    )
-                    successful_downloads += 1
-                    _LOGGER.info("Photo %s: Saved successfully: %s", idx + 1, filename)
+            # Decrypt, decode and save the rest in one executor job
+            to_save = [
+                (idx, blob_hash, picture_blobs[idx]) for idx, blob_hash in pending
+            ]
+            successful_downloads, duplicates = await self.hass.async_add_executor_job(
+                self._save_new_photos, tracker.api, media_dir, existing, to_save
+            )
+            skipped_duplicates = duplicates + len(picture_blobs) - len(pending)
 
-                except Exception as e:
-                    _LOGGER.error(
-                        "Failed to decrypt/save photo %s: %s", idx + 1, e, exc_info=True
-                    )
+            if successful_downloads:
+                self._listing = None
 
             _LOGGER.info(
                 "Successfully downloaded %s new photo(s) to %s (skipped %s duplicate(s))",
@@ -626,7 +678,7 @@ class FmdDownloadPhotosButton(ButtonEntity):
                 "photo_count_sensor"
             )
             if photo_sensor:
-                photo_sensor.update_photo_count(len(picture_blobs))
+                await photo_sensor.async_update_photo_count(len(picture_blobs))
                 photo_sensor.async_write_ha_state()
                 _LOGGER.info("Updated photo count sensor")
             else:
@@ -648,6 +700,126 @@ class FmdDownloadPhotosButton(ButtonEntity):
             _LOGGER.error("Unexpected error downloading photos: %s", e, exc_info=True)
             raise HomeAssistantError(f"Photo download failed: {e}") from e
 
+    def _dedup(
+        self, picture_blobs: list[Any], existing: set[str]
+    ) -> list[tuple[int, str]]:
+        """Return (index, blob hash) for blobs that still need decoding.
+
+        Drops blobs already saved to the media directory and blobs repeated
+        within the same batch.
+        """
+        pending: list[tuple[int, str]] = []
+        batch_hashes: set[str] = set()
+        for idx, blob in enumerate(picture_blobs):
+            _LOGGER.debug("Processing photo %s/%s", idx + 1, len(picture_blobs))
+            blob_hash = _blob_hash(blob)
+            known_filename = self._known_blobs.get(blob_hash)
+            if known_filename:
+                if known_filename in existing:
+                    _LOGGER.info(
+                        "Photo %s: Skipping duplicate (already downloaded): %s",
+                        idx + 1,
+                        known_filename,
+                    )
+                    continue
+                # The saved file is gone, so the entry is stale
+                del self._known_blobs[blob_hash]
+            if blob_hash in batch_hashes:
+                _LOGGER.info(
+                    "Photo %s: Skipping duplicate (repeated in this batch)", idx + 1
+                )
+                continue
+            batch_hashes.add(blob_hash)
+            pending.append((idx, blob_hash))
+        return pending
+
+    def _save_new_photos(
+        self,
+        client: FmdClient,
+        media_dir: Path,
+        existing: set[str],
+        pending: list[tuple[int, str, Any]],
+    ) -> tuple[int, int]:
+        """Decrypt, decode, name and save photos one at a time (runs in the executor).
+
+        Only one decoded image is held in memory at a time. Returns the number
+        of photos saved and the number skipped as duplicates of existing files.
+        """
+        saved = skipped = 0
+        for idx, blob_hash, blob in pending:
+            try:
+                image_bytes = _decode_picture(client, blob)
+                _LOGGER.debug(
+                    "Photo %s: Decoded, size = %s bytes", idx + 1, len(image_bytes)
+                )
+
+                filename = _photo_filename(idx, image_bytes, self._exif_timestamps)
+
+                # Skip if file already exists (duplicate), including within this batch
+                if filename in existing:
+                    _LOGGER.info(
+                        "Photo %s: Skipping duplicate (file exists): %s",
+                        idx + 1,
+                        filename,
+                    )
+                    skipped += 1
+                    self._known_blobs[blob_hash] = filename
+                    continue
+
+                # write_bytes() writes through a memoryview, so the decoded
+                # image is not copied again before it reaches the kernel.
+                (media_dir / filename).write_bytes(image_bytes)
+            except Exception as e:
+                _LOGGER.error(
+                    "Failed to decrypt/save photo %s: %s", idx + 1, e, exc_info=True
+                )
+                continue
+
+            existing.add(filename)
+            saved += 1
+            self._known_blobs[blob_hash] = filename
+            _LOGGER.info("Photo %s: Saved successfully: %s", idx + 1, filename)
+        return saved, skipped
+
+    def _prepare_media_dir(self) -> tuple[Path, set[str]]:
+        """Resolve and create the device's media directory, listing its photos.
+
+        Runs in the executor, since every step touches the filesystem.
+        """
+        # Use /media for Docker/Core installations, falls back to config/media for HAOS
+        media_base = Path(MEDIA_ROOT)
+        if (
+            not media_base.exists()
+            or not media_base.is_dir()
+            or not os.access(media_base, os.W_OK)
+        ):
+            # Fall back to config/media for Home Assistant OS
+            media_base = Path(self.hass.config.path("media"))
+
+        # Use device ID for subdirectory to separate photos from multiple devices
+        media_dir = media_base / "fmd" / self._entry.data["id"]
+        self._mkdir_media_dir(media_dir)
+        # One directory scan up front instead of an exists() call per photo
+        return media_dir, self._existing_photo_names(media_dir)
+
+    def _mkdir_media_dir(self, media_dir: Path) -> None:
+        """Create the device's media directory and any missing parents."""
+        media_dir.mkdir(parents=True, exist_ok=True)
+
+    def _existing_photo_names(self, media_dir: Path) -> set[str]:
+        """Return file names in the media directory (runs in the executor).
+
+        The last scan is reused while the directory mtime is unchanged, since
+        creating or deleting a file always bumps it.
+        """
+        try:
+            key = (str(media_dir), os.stat(media_dir).st_mtime_ns)
+        except OSError:
+            return set()
+        if self._listing is None or self._listing[0] != key:
+            self._listing = (key, frozenset(_scan_photo_names(media_dir)))
+        return set(self._listing[1])
+
     async def _cleanup_old_photos(self, media_dir: Path, max_to_retain: int) -> None:
         """Delete oldest photos if count exceeds retention limit.
 
@@ -656,9 +828,11 @@ class FmdDownloadPhotosButton(ButtonEntity):
             max_to_retain: Maximum number of photos to keep
         """
         try:
-            # Get all photos in the directory
-            photos = list(media_dir.glob("*.jpg"))
-            photo_count = len(photos)
+            # Get all photos in the directory, sorted by modification time (oldest first)
+            photos_sorted = await self.hass.async_add_executor_job(
+                _photos_oldest_first, media_dir
+            )
+            photo_count = len(photos_sorted)
 
             if photo_count <= max_to_retain:
                 _LOGGER.debug(
@@ -677,18 +851,23 @@ class FmdDownloadPhotosButton(ButtonEntity):
             )
             _LOGGER.warning("🗑️ Deleting %d oldest photo(s)...", photos_to_delete)
 
-            # Sort by file modification time (oldest first)
-            photos_sorted = sorted(photos, key=lambda p: p.stat().st_mtime)
-
-            deleted_count = 0
+            deleted: set[str] = set()
             for photo in photos_sorted[:photos_to_delete]:
                 try:
                     _LOGGER.info("🗑️ Deleting old photo: %s", photo.name)
                     await self.hass.async_add_executor_job(photo.unlink)
-                    deleted_count += 1
+                    deleted.add(photo.name)
+                    self._listing = None
                 except Exception as e:
                     _LOGGER.error("Failed to delete photo %s: %s", photo.name, e)
 
+            # Forget the blobs behind deleted photos so the map cannot grow forever
+            for blob_hash in [
+                h for h, name in self._known_blobs.items() if name in deleted
+            ]:
+                del self._known_blobs[blob_hash]
+            deleted_count = len(deleted)
+
             _LOGGER.warning(
                 "✅ Auto-cleanup complete: Deleted %d photo(s), %d remaining",
                 deleted_count,
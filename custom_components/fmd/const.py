@@ -6,8 +6,12 @@ DOMAIN = "fmd"
 DEFAULT_POLLING_INTERVAL = 30
 DEFAULT_HIGH_FREQUENCY_INTERVAL = 5
 
+# Seconds for the device to upload a fresh location after a location request
+LOCATION_REQUEST_WAIT = 10
+
 # Photo settings
 DEFAULT_MAX_PHOTOS_TO_DOWNLOAD = 10
+MEDIA_ROOT = "/media"  # Preferred photo root for Docker/Core; HAOS uses config/media
 MEDIA_FOLDER_BASE = "fmd"  # Base folder under /media/ or /config/media/
 # Photos stored in: /media/fmd/<device-id>/ or /config/media/fmd/<device-id>/
 
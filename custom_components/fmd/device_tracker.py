@@ -1,6 +1,7 @@
 """Device tracker for FMD integration."""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
@@ -24,6 +25,7 @@ from .const import (
     DEFAULT_HIGH_FREQUENCY_INTERVAL,
     DEFAULT_POLLING_INTERVAL,
     DOMAIN,
+    LOCATION_REQUEST_WAIT,
     METERS_TO_FEET,
     MPS_TO_MPH,
 )
@@ -171,8 +173,6 @@ class FmdDeviceTracker(TrackerEntity):
                         "High-frequency mode active - requesting fresh location from device"
                     )
                     try:
-                        import asyncio
-
                         # Determine provider based on "Location Source" select entity
                         # Default to "all" if entity not found or state unknown
                         provider = "all"
@@ -202,10 +202,11 @@ class FmdDeviceTracker(TrackerEntity):
                         success = await self.api.request_location(provider=provider)
                         if success:
                             _LOGGER.debug(
-                                "Location request sent, waiting 10 seconds for device..."
+                                "Location request sent, waiting %s seconds for device...",
+                                LOCATION_REQUEST_WAIT,
                             )
                             # Wait for device to process command and upload location
-                            await asyncio.sleep(10)
+                            await asyncio.sleep(LOCATION_REQUEST_WAIT)
                         else:
                             _LOGGER.warning("Failed to request location from device")
                     except Exception as e:
@@ -263,11 +264,10 @@ class FmdDeviceTracker(TrackerEntity):
                 success = await self.api.request_location(provider="all")
                 if success:
                     _LOGGER.info(
-                        "Location request sent. Waiting 10 seconds for device response..."
+                        "Location request sent. Waiting %s seconds for device response...",
+                        LOCATION_REQUEST_WAIT,
                     )
-                    import asyncio
-
-                    await asyncio.sleep(10)
+                    await asyncio.sleep(LOCATION_REQUEST_WAIT)
 
                     # Fetch the updated location
                     await self.async_update()
@@ -0,0 +1,87 @@
+"""Minimal EXIF reader for FMD photo timestamps.
+
+Only walks the JPEG header segments and the TIFF directories inside the EXIF
+APP1 segment, so no image data is decoded.
+"""
+from __future__ import annotations
+
+import struct
+
+_SOI = b"\xff\xd8"
+_APP1 = 0xE1
+_SOS = 0xDA
+_EXIF_HEADER = b"Exif\x00\x00"
+_EXIF_IFD_POINTER = 0x8769
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+
+
+def read_exif_text_tags(data: bytes) -> dict[int, str] | None:
+    """Return the ASCII tags from IFD0 and the Exif sub-IFD of a JPEG.
+
+    Returns None when the data is not a JPEG or carries no EXIF segment.
+    Malformed EXIF structures raise ValueError or struct.error.
+    """
+    tiff = _exif_tiff_block(data)
+    if tiff is None:
+        return None
+
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        raise ValueError("Invalid TIFF byte order in EXIF segment")
+
+    (ifd0_offset,) = struct.unpack_from(endian + "I", tiff, 4)
+    tags: dict[int, str] = {}
+    exif_ifd_offset = _read_ifd(tiff, endian, ifd0_offset, tags)
+    if exif_ifd_offset:
+        _read_ifd(tiff, endian, exif_ifd_offset, tags)
+    return tags
+
+
+def _exif_tiff_block(data: bytes) -> memoryview | None:
+    """Return the TIFF block of the first EXIF APP1 segment, if any."""
+    if not data.startswith(_SOI):
+        return None
+
+    view = memoryview(data)
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker == _SOS:
+            # Compressed image data follows; header segments are over
+            return None
+        (length,) = struct.unpack_from(">H", data, pos + 2)
+        segment = view[pos + 4 : pos + 2 + length]
+        if marker == _APP1 and segment[:6] == _EXIF_HEADER:
+            return segment[6:]
+        pos += 2 + length
+    return None
+
+
+def _read_ifd(tiff: memoryview, endian: str, offset: int, tags: dict[int, str]) -> int:
+    """Collect ASCII entries of one IFD into tags and return the Exif IFD pointer."""
+    (count,) = struct.unpack_from(endian + "H", tiff, offset)
+    exif_ifd_offset = 0
+    for entry in range(count):
+        tag, typ, n, value = struct.unpack_from(
+            endian + "HHI4s", tiff, offset + 2 + entry * 12
+        )
+        if tag == _EXIF_IFD_POINTER and typ == _TYPE_LONG:
+            (exif_ifd_offset,) = struct.unpack(endian + "I", value)
+        elif typ == _TYPE_ASCII:
+            if n <= 4:
+                raw = value[:n]
+            else:
+                (start,) = struct.unpack(endian + "I", value)
+                raw = tiff[start : start + n].tobytes()
+            tags[tag] = raw.split(b"\x00", 1)[0].decode("ascii", "replace")
+    return exif_ifd_offset
@@ -11,7 +11,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import DOMAIN, MEDIA_ROOT
 
 if TYPE_CHECKING:
     from fmd_api import FmdClient  # pragma: no cover
@@ -99,11 +99,13 @@ class FmdPhotoCountSensor(SensorEntity):
             # backward compatibility
         }
 
-    def update_photo_count(self, download_count: int) -> None:
+    async def async_update_photo_count(self, download_count: int) -> None:
         """Update the photo count after a download and persist state."""
         self._last_download_count = download_count
         self._last_download_time = datetime.now()
-        self._update_media_folder_count()
+        self._photos_in_media_folder = await self.hass.async_add_executor_job(
+            self._count_media_folder_photos
+        )
 
         # Persist state to config entry
         new_data = dict(self.entry.data)
@@ -114,11 +116,11 @@ class FmdPhotoCountSensor(SensorEntity):
         )
         self.hass.config_entries.async_update_entry(self.entry, data=new_data)
 
-    def _update_media_folder_count(self) -> None:
-        """Count photos in the media folder."""
+    def _count_media_folder_photos(self) -> int:
+        """Count photos in the media folder (runs in the executor)."""
         try:
             # Check /media first (Docker/Core), fall back to config/media (HAOS)
-            media_base = Path("/media")
+            media_base = Path(MEDIA_ROOT)
             if not media_base.exists() or not media_base.is_dir():
                 media_base = Path(self.hass.config.path("media"))
 
@@ -127,9 +129,8 @@ class FmdPhotoCountSensor(SensorEntity):
             media_dir = media_base / "fmd" / device_id
 
             if media_dir.exists():
-                self._photos_in_media_folder = len(list(media_dir.glob("*.jpg")))
-            else:
-                self._photos_in_media_folder = 0
+                return len(list(media_dir.glob("*.jpg")))
+            return 0
         except Exception as e:
             _LOGGER.error(f"Failed to count media folder photos: {e}")
-            self._photos_in_media_folder = 0
+            return 0
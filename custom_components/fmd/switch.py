@@ -194,10 +194,6 @@ class FmdWipeSafetySwitch(SwitchEntity):
         self._attr_is_on = False
         self._auto_disable_task: asyncio.Task[None] | None = None
 
-        # Store reference for the wipe button to access
-        if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
-            hass.data[DOMAIN][entry.entry_id]["wipe_safety_switch"] = self
-
     @property
     def device_info(self) -> dict[str, Any]:
         """Return device info."""
@@ -1,12 +1,68 @@
 """Common helpers for FMD integration tests."""
 from __future__ import annotations
 
+import asyncio
+import base64
+from collections.abc import Callable, Iterable
+from types import SimpleNamespace
+from typing import Any
 from unittest.mock import AsyncMock, patch
+from uuid import uuid4
 
+import pytest
+from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_URL, Platform
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.fmd.button import FmdWipeDeviceButton
 from custom_components.fmd.const import DOMAIN
+from custom_components.fmd.switch import FmdWipeSafetySwitch
+from custom_components.fmd.text import FmdWipePinText
+
+SAFETY_SWITCH = "switch.fmd_test_user_wipe_safety_switch"
+WIPE_EXECUTE = "button.fmd_test_user_wipe_execute"
+WIPE_PIN_TEXT = "text.fmd_test_user_wipe_pin"
+ENTRY_ID = "test_entry_id"
+
+# Password-based test_user entry that setup can load: pass TEST_USER_DATA as
+# make_entry's data (merging any overrides into it) plus **TEST_USER_ENTRY
+TEST_USER_DATA: dict[str, Any] = {
+    CONF_URL: "https://fmd.example.com",
+    CONF_ID: "test_user",
+    CONF_PASSWORD: "test_password",
+    "polling_interval": 30,
+    "allow_inaccurate_locations": False,
+    "use_imperial": False,
+}
+TEST_USER_ENTRY: dict[str, Any] = {
+    "version": 1,
+    "title": "test_user",
+    "entry_id": ENTRY_ID,
+    "unique_id": "test_user",
+}
+
+
+# Marks the stand-in encrypted blobs that mock_fmd_api's client can decrypt
+FAKE_BLOB_PREFIX = "fake-encrypted:"
+
+
+def encrypt_blob(plaintext: bytes) -> str:
+    """Return a stand-in encrypted blob that mock_fmd_api's client decrypts.
+
+    A random nonce makes every blob unique, as real encryption does, so equal
+    plaintexts still give distinct blobs.
+    """
+    return f"{FAKE_BLOB_PREFIX}{uuid4().hex}:{plaintext.hex()}"
+
+
+def decrypt_blob(blob: str) -> bytes:
+    """Return the plaintext of a blob made by encrypt_blob."""
+    return bytes.fromhex(blob.rsplit(":", 1)[1])
+
+
+def picture_blob(image: bytes) -> str:
+    """Return a stand-in encrypted picture blob; it decrypts to base64 text."""
+    return encrypt_blob(base64.b64encode(image))
 
 
 def get_mock_config_entry() -> MockConfigEntry:
@@ -14,8 +70,6 @@ def get_mock_config_entry() -> MockConfigEntry:
 
     Returns a MockConfigEntry that can be modified before being added to hass.
     """
-    from homeassistant.const import CONF_ID, CONF_URL
-
     return MockConfigEntry(
         version=1,
         domain=DOMAIN,
@@ -36,7 +90,7 @@ def get_mock_config_entry() -> MockConfigEntry:
             "allow_inaccurate_locations": False,
             "use_imperial": False,
         },
-        entry_id="test_entry_id",
+        entry_id=ENTRY_ID,
         unique_id="test_user",
     )
 
@@ -49,15 +103,79 @@ async def setup_integration(
 
     This is a helper function, not a fixture, so tests can call it directly.
     """
-
-    # Mock async_add_executor_job to actually execute the callable
-    # This is needed because device_tracker uses it to run decrypt_data_blob
-    async def mock_executor_job(func, *args):
-        return func(*args)
-
     config_entry = get_mock_config_entry()
     config_entry.add_to_hass(hass)
 
-    with patch.object(hass, "async_add_executor_job", side_effect=mock_executor_job):
+    # Run executor jobs inline; device_tracker uses them to run decrypt_data_blob
+    with patch.object(hass, "async_add_executor_job", side_effect=inline_executor_job):
         await hass.config_entries.async_setup(config_entry.entry_id)
         await hass.async_block_till_done()
+
+
+async def setup_integration_minimal(
+    hass: HomeAssistant,
+    mock_fmd_api: AsyncMock,
+    platforms: Iterable[Platform],
+) -> None:
+    """Set up the FMD integration forwarding only the given platforms."""
+    with patch("custom_components.fmd.PLATFORMS", list(platforms)):
+        await setup_integration(hass, mock_fmd_api)
+
+
+def get_entry_data(hass: HomeAssistant) -> dict[str, Any]:
+    """Return the hass.data store of the entry setup_integration loads."""
+    return hass.data[DOMAIN][ENTRY_ID]
+
+
+def get_wipe_entities(
+    hass: HomeAssistant,
+) -> tuple[FmdWipeSafetySwitch, FmdWipePinText, FmdWipeDeviceButton]:
+    """Return the wipe safety switch, wipe PIN text and wipe execute button.
+
+    Lets tests drive the entities directly instead of through service calls.
+    The handles come from the platform components, not the integration store.
+    """
+    return (
+        hass.data["switch"].get_entity(SAFETY_SWITCH),
+        hass.data["text"].get_entity(WIPE_PIN_TEXT),
+        hass.data["button"].get_entity(WIPE_EXECUTE),
+    )
+
+
+def prime_wipe_state(
+    hass: HomeAssistant,
+    entry_id: str,
+    *,
+    pin: str | None = None,
+    pin_entity_missing: bool = False,
+    safety: str = "on",
+) -> None:
+    """Set the safety switch state and swap in a stand-in wipe PIN entity.
+
+    With pin_entity_missing the PIN entity is removed instead of replaced.
+    """
+    hass.states.async_set(SAFETY_SWITCH, safety)
+    entry_data = hass.data[DOMAIN][entry_id]
+    if pin_entity_missing:
+        entry_data.pop("wipe_pin_text", None)
+    else:
+        entry_data["wipe_pin_text"] = SimpleNamespace(native_value=pin)
+
+
+def log_contains(caplog: pytest.LogCaptureFixture, needle: str) -> bool:
+    """Return True if any captured log message contains needle."""
+    return any(needle in record.getMessage() for record in caplog.records)
+
+
+def inline_executor_job(func: Callable[..., Any], *args: Any) -> asyncio.Future[Any]:
+    """Run func now and return its outcome as an already-completed future.
+
+    Drop-in side_effect for hass.async_add_executor_job: no worker thread and
+    no coroutine object per call, and awaiting the result never suspends.
+    """
+    future = asyncio.get_running_loop().create_future()
+    try:
+        future.set_result(func(*args))
+    except Exception as err:  # re-raised when the future is awaited
+        future.set_exception(err)
+    return future
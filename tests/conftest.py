@@ -1,8 +1,10 @@
 """Fixtures for FMD integration tests."""
 from __future__ import annotations
 
+import json
 import sys
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 # Force enable sockets on Windows to avoid pytest-socket blocking ProactorEventLoop
@@ -23,9 +25,33 @@ if sys.platform.startswith("win"):
         pass
 
 import asyncio  # noqa: E402
+from types import ModuleType, SimpleNamespace  # noqa: E402
+from typing import TYPE_CHECKING, Any  # noqa: E402
 
 import pytest  # noqa: E402
+from fmd_api import FmdClient  # noqa: E402
 from homeassistant import loader  # noqa: E402
+from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_URL  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.fmd.const import DOMAIN  # noqa: E402
+from tests.common import (  # noqa: E402
+    FAKE_BLOB_PREFIX,
+    decrypt_blob,
+    get_mock_config_entry,
+    inline_executor_job,
+    setup_integration,
+)
+
+_bb: ModuleType | None
+try:
+    import blockbuster as _bb
+except ImportError:
+    # Optional: without blockbuster installed, loop-blocking calls go undetected
+    _bb = None
+
+if TYPE_CHECKING:
+    from blockbuster import BlockBuster
 
 
 @pytest.fixture(scope="function")
@@ -47,10 +73,41 @@ async def auto_enable_custom_integrations(enable_custom_integrations):
     yield
 
 
+@pytest.fixture(autouse=True)
+def blockbuster() -> Generator[BlockBuster | None, None, None]:
+    """Fail the test when integration code makes a blocking call on the event loop.
+
+    inline_executor_job deliberately runs executor jobs on the loop thread, so
+    calls made through it are allowed, as are log handlers writing to stderr.
+    """
+    if _bb is None:
+        yield None
+        return
+    with _bb.blockbuster_ctx("custom_components.fmd") as bb:
+        for func in bb.functions.values():
+            func.can_block_in("tests/common.py", "inline_executor_job")
+        bb.functions["io.TextIOWrapper.write"].can_block_in(
+            "logging/__init__.py", "emit"
+        )
+        yield bb
+
+
 @pytest.fixture
-def mock_fmd_api():
+def mock_device() -> SimpleNamespace:
+    """Mock fmd_api Device with only the methods the integration calls."""
+    return SimpleNamespace(
+        get_picture_blobs=AsyncMock(return_value=[]),
+        wipe=AsyncMock(return_value=None),
+        lock=AsyncMock(return_value=None),
+    )
+
+
+@pytest.fixture
+def mock_fmd_api(mock_device: SimpleNamespace):
     """Mock FmdClient for testing."""
-    api_instance = AsyncMock()
+    # Spec'd to the real client so tests cannot configure or assert on methods
+    # the client does not have; device() is the one deliberate addition below
+    api_instance = AsyncMock(spec=FmdClient)
 
     # Mock authentication artifact methods (fmd_api 2.0.4+)
     api_instance.export_auth_artifacts = AsyncMock(
@@ -88,26 +145,8 @@ def mock_fmd_api():
     api_instance.set_ringer_mode = AsyncMock(return_value=True)
     api_instance.take_picture = AsyncMock(return_value=True)  # Used for camera capture
     api_instance.get_pictures = AsyncMock(return_value=[])
-    api_instance.get_photos = AsyncMock(return_value=[])  # Alias for get_pictures
-
-    # Mock device method for new API (fmd_api 2.0.4+)
-    mock_device = AsyncMock()
-    mock_device.get_picture_blobs = AsyncMock(return_value=[])
-
-    # Mock PhotoResult for decode_picture
-    from datetime import datetime
-
-    mock_photo_result = MagicMock()
-    mock_photo_result.data = b"fake_image_data"
-    mock_photo_result.mime_type = "image/jpeg"
-    mock_photo_result.timestamp = datetime(2025, 10, 23, 12, 0, 0)
-    mock_photo_result.raw = {}
-    mock_device.decode_picture = AsyncMock(return_value=mock_photo_result)
-
-    # Mock wipe and lock with new parameters
-    mock_device.wipe = AsyncMock(return_value=None)
-    mock_device.lock = AsyncMock(return_value=None)
 
+    # Device stub for new API (fmd_api 2.0.4+) comes from the mock_device fixture
     api_instance.device = MagicMock(return_value=mock_device)
 
     # Mock synchronous decrypt_data_blob method
@@ -115,8 +154,9 @@ def mock_fmd_api():
     # Use side_effect to handle both the test dict inputs and default behavior
     def decrypt_blob_side_effect(blob_input):
         """Decrypt blob - if it's a dict (from test), return it as JSON bytes."""
-        import json
-
+        if isinstance(blob_input, str) and blob_input.startswith(FAKE_BLOB_PREFIX):
+            # Blob made by encrypt_blob or picture_blob
+            return decrypt_blob(blob_input)
         if isinstance(blob_input, dict):
             # Test is passing a dict directly, convert it to JSON bytes
             return json.dumps(blob_input).encode("utf-8")
@@ -171,6 +211,99 @@ def mock_fmd_api():
         yield mock_api_class
 
 
+@pytest.fixture
+def standalone_fmd_client() -> AsyncMock:
+    """Spec'd FmdClient on its own, not wired into the integration.
+
+    It authenticates and exports auth artifacts, for config flow tests that
+    patch FmdClient.create themselves.
+    """
+    client = AsyncMock(spec=FmdClient)
+    client.get_locations.return_value = [{"lat": 1, "lon": 2}]
+    client.export_auth_artifacts.return_value = {
+        "base_url": "https://fmd.example.com",
+        "fmd_id": "test_user",
+        "access_token": "mock_access_token",
+        "private_key": "mock_private_key",
+        "password_hash": "mock_password_hash",
+    }
+    client.close.return_value = None
+    return client
+
+
+@pytest.fixture
+def loaded_fmd_client(mock_fmd_api: AsyncMock) -> AsyncMock:
+    """The client the integration loads: what create and from_auth_artifacts return."""
+    return mock_fmd_api.from_auth_artifacts.return_value
+
+
+@pytest.fixture
+def mock_request_location_fail(loaded_fmd_client: AsyncMock) -> AsyncMock:
+    """Make the client's request_location report failure from the start.
+
+    Request it before loaded_entry so setup already sees the failing mock.
+    """
+    request_location = loaded_fmd_client.request_location
+    request_location.return_value = False
+    return request_location
+
+
+@pytest.fixture
+async def loaded_entry(hass, mock_fmd_api: AsyncMock) -> str:
+    """Set up the integration against mock_fmd_api and return its entry id."""
+    await setup_integration(hass, mock_fmd_api)
+    return get_mock_config_entry().entry_id
+
+
+@pytest.fixture(autouse=True)
+def no_device_waits(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Skip the fixed waits that give a real device time to respond.
+
+    The location request wait and the command select reset delay are plain
+    asyncio.sleep calls, so they would otherwise stall each test in real time.
+    """
+    for module in ("button", "device_tracker"):
+        monkeypatch.setattr(f"custom_components.fmd.{module}.LOCATION_REQUEST_WAIT", 0)
+    monkeypatch.setattr("custom_components.fmd.select.RESET_DELAY", 0)
+
+
+@pytest.fixture(autouse=True)
+def isolated_media_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep every test's photo downloads out of the shared /media directory.
+
+    Tests running in parallel xdist workers would otherwise write to and
+    deduplicate against the same /media/fmd/<device-id> folder.
+    """
+    root = tmp_path / "media"
+    root.mkdir()
+    for module in ("button", "sensor"):
+        monkeypatch.setattr(f"custom_components.fmd.{module}.MEDIA_ROOT", str(root))
+    return root
+
+
+@pytest.fixture
+def media_root(
+    hass, isolated_media_root: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Point photo downloads at tmp_path and return the (existing) media root.
+
+    Remove the returned directory to exercise the config/media fallback, which
+    resolves under tmp_path / "config".
+    """
+    root = isolated_media_root
+    monkeypatch.setattr(
+        hass.config, "path", lambda *parts: str(tmp_path.joinpath("config", *parts))
+    )
+    return root
+
+
+@pytest.fixture
+def sync_executor(hass):
+    """Run hass.async_add_executor_job callables inline on the event loop."""
+    with patch.object(hass, "async_add_executor_job", side_effect=inline_executor_job):
+        yield
+
+
 @pytest.fixture
 def mock_setup_entry() -> Generator[AsyncMock, None, None]:
     """Override async_setup_entry."""
@@ -199,3 +332,24 @@ def mock_config_entry():
         "allow_inaccurate_locations": False,
         "use_imperial": False,
     }
+
+
+@pytest.fixture
+def make_entry() -> Callable[..., MockConfigEntry]:
+    """Return a factory for password-based FMD entries; kwargs override defaults.
+
+    A ``data`` kwarg is merged over the default credentials, any other kwarg
+    is passed straight to MockConfigEntry. Pass TEST_USER_DATA and
+    TEST_USER_ENTRY from tests.common for the test_user entry setup can load.
+    """
+
+    def _make(**kwargs: Any) -> MockConfigEntry:
+        data = {
+            CONF_URL: "http://test",
+            CONF_ID: "user",
+            CONF_PASSWORD: "oldpass",
+            **kwargs.pop("data", {}),
+        }
+        return MockConfigEntry(domain=DOMAIN, data=data, **kwargs)
+
+    return _make
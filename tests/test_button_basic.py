@@ -8,7 +8,7 @@ from fmd_api import AuthenticationError, FmdApiException, OperationError
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 
-from tests.common import setup_integration
+from tests.common import get_entry_data, setup_integration
 
 
 async def test_location_update_button(
@@ -45,7 +45,6 @@ async def test_location_update_uses_selected_provider_gps(
         },
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Press location update
     await hass.services.async_call(
@@ -54,7 +53,6 @@ async def test_location_update_uses_selected_provider_gps(
         {"entity_id": "button.fmd_test_user_location_update"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify provider mapping
     assert mock_fmd_api.create.return_value.request_location.called
@@ -76,7 +74,6 @@ async def test_location_update_default_provider(
         {"entity_id": "button.fmd_test_user_location_update"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Ensure provider default was used
     mock_fmd_api.create.return_value.request_location.assert_called()
@@ -100,7 +97,6 @@ async def test_location_update_missing_select_entity(
         {"entity_id": "button.fmd_test_user_location_update"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Ensure request_location still called with default provider 'all'
     assert mock_fmd_api.create.return_value.request_location.called
@@ -116,7 +112,7 @@ async def test_location_update_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     await hass.services.async_call(
         "button",
@@ -124,7 +120,6 @@ async def test_location_update_tracker_not_found(
         {"entity_id": "button.fmd_test_user_location_update"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Should handle gracefully - API should not be called
     mock_fmd_api.create.return_value.request_location.assert_not_called()
@@ -143,7 +138,6 @@ async def test_ring_button(
         {"entity_id": "button.fmd_test_user_volume_ring_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     mock_fmd_api.create.return_value.send_command.assert_called_once_with("ring")
 
@@ -168,8 +162,6 @@ async def test_ring_button_api_error(
             {"entity_id": "button.fmd_test_user_volume_ring_device"},
             blocking=True,
         )
-
-    await hass.async_block_till_done()
     mock_fmd_api.create.return_value.send_command.assert_called_once_with("ring")
 
 
@@ -189,7 +181,6 @@ async def test_ring_button_returns_false(
         {"entity_id": "button.fmd_test_user_volume_ring_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     mock_fmd_api.create.return_value.send_command.assert_called_once_with("ring")
 
@@ -207,7 +198,6 @@ async def test_lock_button(
         {"entity_id": "button.fmd_test_user_lock_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Lock button now uses device.lock() with optional message
     mock_fmd_api.create.return_value.device.return_value.lock.assert_called_once()
@@ -237,7 +227,6 @@ async def test_lock_button_with_message(
         {"entity_id": "button.fmd_test_user_lock_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify lock was called with the message
     mock_device = mock_fmd_api.create.return_value.device.return_value
@@ -303,7 +292,6 @@ async def test_capture_front_button(
         {"entity_id": "button.fmd_test_user_photo_capture_front"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     mock_fmd_api.create.return_value.take_picture.assert_called_once_with("front")
 
@@ -321,7 +309,6 @@ async def test_capture_rear_button(
         {"entity_id": "button.fmd_test_user_photo_capture_rear"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     mock_fmd_api.create.return_value.take_picture.assert_called_once_with("back")
 
@@ -345,8 +332,6 @@ async def test_capture_photo_api_error(
         {"entity_id": "button.fmd_test_user_photo_capture_front"},
         blocking=True,
     )
-
-    await hass.async_block_till_done()
     mock_fmd_api.create.return_value.take_picture.assert_called_once_with("front")
 
 
@@ -365,6 +350,5 @@ async def test_capture_returns_false(
         {"entity_id": "button.fmd_test_user_photo_capture_front"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     mock_fmd_api.create.return_value.take_picture.assert_called_once_with("front")
@@ -1,14 +1,15 @@
 """Test FMD button entities - additional coverage."""
 from __future__ import annotations
 
-import io
-from unittest.mock import AsyncMock, patch
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, call, patch
 
+import pytest
 from homeassistant.core import HomeAssistant
-from PIL import Image
 
-from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from custom_components.fmd.button import _photo_content_hash
+from tests.common import get_entry_data, log_contains, picture_blob, setup_integration
 
 
 async def test_button_ring_tracker_not_found(
@@ -19,8 +20,7 @@ async def test_button_ring_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    get_entry_data(hass)["tracker"] = None
 
     # Try to press ring button (should log error but not crash)
     await hass.services.async_call(
@@ -29,7 +29,6 @@ async def test_button_ring_tracker_not_found(
         {"entity_id": "button.fmd_test_user_volume_ring_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_button_lock_tracker_not_found(
@@ -40,8 +39,7 @@ async def test_button_lock_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    get_entry_data(hass)["tracker"] = None
 
     # Try to press lock button (should log error but not crash)
     await hass.services.async_call(
@@ -50,7 +48,6 @@ async def test_button_lock_tracker_not_found(
         {"entity_id": "button.fmd_test_user_lock_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_button_capture_front_tracker_not_found(
@@ -61,8 +58,7 @@ async def test_button_capture_front_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    get_entry_data(hass)["tracker"] = None
 
     # Try to press capture front button (should log error but not crash)
     await hass.services.async_call(
@@ -71,7 +67,6 @@ async def test_button_capture_front_tracker_not_found(
         {"entity_id": "button.fmd_test_user_photo_capture_front"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_button_capture_rear_tracker_not_found(
@@ -82,8 +77,7 @@ async def test_button_capture_rear_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    get_entry_data(hass)["tracker"] = None
 
     # Try to press capture rear button (should log error but not crash)
     await hass.services.async_call(
@@ -92,7 +86,6 @@ async def test_button_capture_rear_tracker_not_found(
         {"entity_id": "button.fmd_test_user_photo_capture_rear"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_button_ring_send_command_fails(
@@ -113,7 +106,6 @@ async def test_button_ring_send_command_fails(
         {"entity_id": "button.fmd_test_user_volume_ring_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     api_instance.send_command.assert_called_once_with("ring")
 
@@ -136,7 +128,6 @@ async def test_button_lock_device_error(
         {"entity_id": "button.fmd_test_user_lock_device"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify device.lock() was called
     device_mock.lock.assert_called_once_with(message=None)
@@ -160,7 +151,6 @@ async def test_button_capture_front_take_picture_fails(
         {"entity_id": "button.fmd_test_user_photo_capture_front"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     api_instance.take_picture.assert_called_once_with("front")
 
@@ -183,88 +173,62 @@ async def test_button_capture_rear_take_picture_fails(
         {"entity_id": "button.fmd_test_user_photo_capture_rear"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     api_instance.take_picture.assert_called_once_with("back")
 
 
 async def test_button_download_photos_sensor_not_found(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    media_root: Path,
 ) -> None:
     """Test download photos button handles missing photo sensor gracefully."""
-    # Create a simple image
-    img = Image.new("RGB", (100, 100), color="green")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-
-    # Mock API response
-    mock_fmd_api.create.return_value.get_location.return_value = {
-        "pictures": [img_bytes.getvalue()],
-        "location": [],
-    }
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"img_data")]
 
     await setup_integration(hass, mock_fmd_api)
 
     # Remove the photo sensor
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    del hass.data[DOMAIN][entry_id]["photo_count_sensor"]
+    del get_entry_data(hass)["photo_count_sensor"]
 
     # Press the button - should not crash
-    with patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.exists", return_value=False), patch(
-        "pathlib.Path.write_bytes"
-    ):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 1
 
 
 async def test_button_download_photos_cleanup_delete_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Test photo cleanup handles file deletion errors gracefully."""
     await setup_integration(hass, mock_fmd_api)
 
-    entry_id = list(hass.data[DOMAIN].keys())[0]
+    entry_data = get_entry_data(hass)
 
     # Enable auto-cleanup and set max to 1
-    cleanup_switch = hass.data[DOMAIN][entry_id]["photo_auto_cleanup_switch"]
+    cleanup_switch = entry_data["photo_auto_cleanup_switch"]
     await cleanup_switch.async_turn_on()
 
-    max_photos = hass.data[DOMAIN][entry_id]["max_photos_number"]
+    max_photos = entry_data["max_photos_number"]
     max_photos._attr_native_value = 1
 
-    # Create two images
-    img1 = Image.new("RGB", (100, 100), color="red")
-    img2 = Image.new("RGB", (100, 100), color="blue")
-
-    img1_bytes = io.BytesIO()
-    img1.save(img1_bytes, format="JPEG")
-    img1_bytes.seek(0)
-
-    img2_bytes = io.BytesIO()
-    img2.save(img2_bytes, format="JPEG")
-    img2_bytes.seek(0)
-
-    # Mock API response with two photos
-    mock_fmd_api.create.return_value.get_location.return_value = {
-        "pictures": [img1_bytes.getvalue(), img2_bytes.getvalue()],
-        "location": [],
-    }
+    # Two distinct photos, one more than the retention limit
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(b"red_image"),
+        picture_blob(b"blue_image"),
+    ]
 
     # Mock Path.unlink to raise exception
-    with patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.exists", return_value=False), patch(
-        "pathlib.Path.write_bytes"
-    ), patch(
-        "pathlib.Path.unlink", side_effect=Exception("Permission denied")
-    ):
+    with patch("pathlib.Path.unlink", side_effect=Exception("Permission denied")):
         # Press the button - should handle error
         await hass.services.async_call(
             "button",
@@ -273,6 +237,9 @@ async def test_button_download_photos_cleanup_delete_error(
             blocking=True,
         )
 
+    assert log_contains(caplog, "Failed to delete photo")
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 2
+
 
 async def test_button_wipe_device_success(
     hass: HomeAssistant, mock_fmd_api: AsyncMock
@@ -280,14 +247,14 @@ async def test_button_wipe_device_success(
     """Test wipe device button successfully calls device.wipe()."""
     await setup_integration(hass, mock_fmd_api)
 
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-
     # Enable wipe safety
-    safety_switch = hass.data[DOMAIN][entry_id]["wipe_safety_switch"]
+    safety_switch = hass.data["switch"].get_entity(
+        "switch.fmd_test_user_wipe_safety_switch"
+    )
     await safety_switch.async_turn_on()
 
     # Get the wipe PIN from the text entity
-    wipe_pin_text = hass.data[DOMAIN][entry_id]["wipe_pin_text"]
+    wipe_pin_text = get_entry_data(hass)["wipe_pin_text"]
     await wipe_pin_text.async_set_value("1234")
 
     # Mock device.wipe()
@@ -301,7 +268,6 @@ async def test_button_wipe_device_success(
         {"entity_id": "button.fmd_test_user_wipe_execute"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify device.wipe() was called with correct parameters
     device_mock.wipe.assert_called_once_with(pin="1234", confirm=True)
@@ -318,7 +284,7 @@ async def test_download_photos_no_tracker(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker
-    hass.data["fmd"]["test_entry_id"].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     await hass.services.async_call(
         "button",
@@ -326,7 +292,6 @@ async def test_download_photos_no_tracker(
         {"entity_id": "button.fmd_test_user_photo_download"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_download_photos_missing_max_photos_number(
@@ -337,7 +302,7 @@ async def test_download_photos_missing_max_photos_number(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove max_photos_number entity reference
-    hass.data["fmd"]["test_entry_id"].pop("max_photos_number", None)
+    get_entry_data(hass).pop("max_photos_number", None)
 
     await hass.services.async_call(
         "button",
@@ -345,7 +310,6 @@ async def test_download_photos_missing_max_photos_number(
         {"entity_id": "button.fmd_test_user_photo_download"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
 
 async def test_download_photos_no_pictures(
@@ -365,25 +329,19 @@ async def test_download_photos_no_pictures(
         {"entity_id": "button.fmd_test_user_photo_download"},
         blocking=True,
     )
-    await hass.async_block_till_done()
     device.get_picture_blobs.assert_called()
 
 
 async def test_download_photos_media_dir_creation_failure(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    media_root: Path,
 ) -> None:
     """Download Photos button handles media directory creation failure."""
-    import base64
-    from unittest.mock import patch
-
-    # Return one fake picture to reach dir creation
-    mock_fmd_api.create.return_value.get_pictures.return_value = [
-        base64.b64encode(b"fake_image").decode()
-    ]
-    mock_fmd_api.create.return_value.decrypt_data_blob.return_value = base64.b64encode(
-        b"jpeg_data"
-    ).decode()
+    # Return one picture to reach dir creation
+    blob = picture_blob(b"img_data")
+    mock_device.get_picture_blobs.return_value = [blob]
 
     await setup_integration(hass, mock_fmd_api)
 
@@ -395,115 +353,79 @@ async def test_download_photos_media_dir_creation_failure(
             {"entity_id": "button.fmd_test_user_photo_download"},
             blocking=True,
         )
-        await hass.async_block_till_done()
 
+    decrypt = mock_fmd_api.create.return_value.decrypt_data_blob
+    assert call(blob) not in decrypt.call_args_list
+    assert not (media_root / "fmd").exists()
 
-async def test_download_photos_exif_timestamp_filename(
+
+async def test_download_photos_hash_only_filename(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
-    tmp_path,
+    media_root: Path,
+    tmp_path: Path,
+    sync_executor: None,
 ) -> None:
-    """Ensure EXIF timestamp is used in filename when present."""
-    from unittest.mock import MagicMock
-
+    """Without EXIF, the photo is named after its content hash alone."""
     # Configure device.get_picture_blobs to return one blob
     device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob_data"]
-
-    # Configure decode_picture to return PhotoResult
-    photo_result = MagicMock()
-    photo_result.data = b"jpeg_bytes"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None  # No timestamp, will use EXIF
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
-
-    # Mock executor to actually run sync functions
-    async def mock_executor_job(func, *args):
-        return func(*args)
+    device.get_picture_blobs.return_value = [picture_blob(b"jpeg_bytes")]
 
     # Setup integration first
     await setup_integration(hass, mock_fmd_api)
 
-    # Force using config/media by making /media path construction return a fake path
-    # that doesn't exist, so the code falls back to hass.config.path("media")
-    from pathlib import Path as RealPath
-
-    def path_constructor(path_str):
-        """Custom Path constructor that returns a non-existent path for /media."""
-        if path_str == "/media":
-            # Return a Path that doesn't exist and isn't a directory
-            fake_media = RealPath("/nonexistent_media_path")
-            return fake_media
-        return RealPath(path_str)
-
-    # Patch media base to a temporary directory; patch Path in the fmd.button module
-    with patch.object(hass, "async_add_executor_job", side_effect=mock_executor_job):
-        # Patch the Path constructor in the button module
-        with patch("custom_components.fmd.button.Path", side_effect=path_constructor):
-            with patch.object(hass.config, "path", return_value=str(tmp_path)):
-                # Patch PIL Image.open to yield EXIF DateTimeOriginal
-                class DummyImg:
-                    def getexif(self):
-                        return {36867: "2025:10:19 15:00:34"}
-
-                with patch("PIL.Image.open", return_value=DummyImg()):
-                    await hass.services.async_call(
-                        "button",
-                        "press",
-                        {"entity_id": "button.fmd_test_user_photo_download"},
-                        blocking=True,
-                    )
-                    await hass.async_block_till_done()
-
-    # Verify file with expected timestamp exists
-    device_dir = tmp_path / "fmd" / "test_user"
+    # Without /media the download falls back to hass.config.path("media")
+    media_root.rmdir()
+
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+
+    # Verify file with the hash-only name exists
+    device_dir = tmp_path / "config" / "media" / "fmd" / "test_user"
     # Debug: check if directory was created
     assert device_dir.exists(), f"Device directory not created: {device_dir}"
     all_files = list(device_dir.glob("*.jpg"))
     assert all_files, f"No JPG files found in {device_dir}"
-    files = list(device_dir.glob("photo_20251019_150034_*.jpg"))
-    assert (
-        files
-    ), f"Expected a photo file with EXIF timestamp in name. Found: {[f.name for f in all_files]}"
+    assert [f.name for f in all_files] == [
+        f"photo_{_photo_content_hash(b'jpeg_bytes')}.jpg"
+    ]
 
 
 async def test_download_photos_duplicate_skip(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
-    tmp_path,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Existing photo with same hash should be skipped (duplicate)."""
-    import base64
-    import hashlib
-
     image_bytes = b"same_image_content"
-    decrypted = base64.b64encode(image_bytes).decode()
-    mock_fmd_api.create.return_value.get_pictures.return_value = [
-        base64.b64encode(image_bytes).decode()
-    ]
-    mock_fmd_api.create.return_value.decrypt_data_blob.return_value = decrypted
-
-    # Use tmp media path and no EXIF
-    with patch.object(hass.config, "path", return_value=str(tmp_path)):
-        with patch("PIL.Image.open", side_effect=Exception("no exif")):
-            await setup_integration(hass, mock_fmd_api)
-
-            # Pre-create duplicate file using same content hash
-            h = hashlib.sha256(image_bytes).hexdigest()[:8]
-            device_dir = tmp_path / "fmd" / "test_user"
-            device_dir.mkdir(parents=True, exist_ok=True)
-            pre_file = device_dir / f"photo_{h}.jpg"
-            pre_file.write_bytes(image_bytes)
-
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
-
-    # Still only one file present
-    files = list((tmp_path / "fmd" / "test_user").glob("*.jpg"))
-    assert len(files) == 1
+    blob = picture_blob(image_bytes)
+    mock_device.get_picture_blobs.return_value = [blob]
+
+    await setup_integration(hass, mock_fmd_api)
+
+    # Pre-create duplicate file using same content hash
+    device_dir = media_root / "fmd" / "test_user"
+    device_dir.mkdir(parents=True)
+    (device_dir / f"photo_{_photo_content_hash(image_bytes)}.jpg").write_bytes(
+        image_bytes
+    )
+
+    # Without EXIF, the download gets the same hash-only filename
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+
+    # The photo was decrypted but not written again
+    decrypt = mock_fmd_api.create.return_value.decrypt_data_blob
+    assert decrypt.call_args_list.count(call(blob)) == 1
+    assert log_contains(caplog, "Skipping duplicate (file exists)")
+    assert len(list(device_dir.glob("*.jpg"))) == 1
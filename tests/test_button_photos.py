@@ -1,103 +1,162 @@
 """Test FMD photo download button entities."""
 from __future__ import annotations
 
-import hashlib
 import io
 import logging
 import os
 import time
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from collections.abc import Callable
 from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fmd_api import AuthenticationError, FmdApiException, OperationError
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from PIL import Image
 
-from custom_components.fmd.button import FmdDownloadPhotosButton
-from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from custom_components.fmd.button import (
+    FmdDownloadPhotosButton,
+    _blob_hash,
+    _photo_content_hash,
+    _photo_filename,
+    _scan_photo_names,
+)
+from tests.common import (
+    ENTRY_ID,
+    FAKE_BLOB_PREFIX,
+    encrypt_blob,
+    get_entry_data,
+    log_contains,
+    picture_blob,
+    setup_integration,
+)
 
 
-async def test_download_photos_button(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+@pytest.fixture(autouse=True)
+async def _auto_setup(
+    request: pytest.FixtureRequest, hass: HomeAssistant, mock_fmd_api: AsyncMock
 ) -> None:
-    """Test download photos button with new picture API (fmd_api 2.0.4+)."""
-    # Mock device() to return the mock device with get_picture_blobs
-    mock_device = mock_fmd_api.create.return_value.device.return_value
+    """Set up the integration before each test unless marked no_autouse_setup."""
+    if request.node.get_closest_marker("no_autouse_setup") is None:
+        await setup_integration(hass, mock_fmd_api)
 
-    # Return two picture blobs
-    mock_device.get_picture_blobs.return_value = [
-        "encrypted_blob_1",
-        "encrypted_blob_2",
-    ]
 
-    # Mock decode_picture to return PhotoResult with unique data
-    def make_photo_result(data: bytes):
-        result = MagicMock()
-        result.data = data
-        result.mime_type = "image/jpeg"
-        result.timestamp = datetime(2025, 10, 23, 12, 0, 0)
-        result.raw = {}
-        return result
-
-    mock_device.decode_picture.side_effect = [
-        make_photo_result(b"fake_jpeg_data_1_unique"),
-        make_photo_result(b"fake_jpeg_data_2_different"),
-    ]
+@pytest.fixture
+def download_button(hass: HomeAssistant, _auto_setup: None) -> FmdDownloadPhotosButton:
+    """Photo download button for the config entry set up by _auto_setup."""
+    return FmdDownloadPhotosButton(hass, hass.config_entries.async_get_entry(ENTRY_ID))
 
-    # Setup integration BEFORE patching Path methods
-    await setup_integration(hass, mock_fmd_api)
 
-    # Use a callable for exists() to handle any number of calls
-    # Returns True for directories, False for photo files
-    def exists_side_effect(self):
-        return "photo_" not in str(self)
+@pytest.fixture
+def decrypted_pictures(loaded_fmd_client: AsyncMock, _auto_setup: None) -> list[str]:
+    """Picture blobs passed to the client's decrypt_data_blob after setup."""
+    pictures: list[str] = []
+    decrypt_location_or_picture = loaded_fmd_client.decrypt_data_blob.side_effect
 
-    with patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.exists", exists_side_effect), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+    def record(blob: Any) -> bytes:
+        if isinstance(blob, str) and blob.startswith(FAKE_BLOB_PREFIX):
+            pictures.append(blob)
+        return decrypt_location_or_picture(blob)
 
-        # Verify get_picture_blobs was called on device
-        mock_device.get_picture_blobs.assert_called_once()
-        # Verify 2 photos were decoded
-        assert mock_device.decode_picture.call_count == 2
-        # Verify 2 photos were written
-        assert mock_write.call_count == 2
+    loaded_fmd_client.decrypt_data_blob.side_effect = record
+    return pictures
 
 
-async def test_download_photos_with_cleanup(
+def _make_jpeg() -> bytes:
+    """Return a small real JPEG with no EXIF data."""
+    buf = io.BytesIO()
+    Image.new("RGB", (100, 100), color="red").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+# Encoded once; the tests only need a decodable JPEG, never specific pixels
+_JPEG_BYTES = _make_jpeg()
+
+
+def _make_exif_jpeg(date_time_original: str) -> bytes:
+    """Return a small real JPEG with DateTimeOriginal in its Exif IFD."""
+    exif = Image.Exif()
+    exif.get_ifd(0x8769)[36867] = date_time_original
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), color="blue").save(buf, format="JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def _write_old_photos(media_dir: Path, names: list[str]) -> None:
+    """Create photo files in media_dir, each newer than the one before it."""
+    media_dir.mkdir(parents=True, exist_ok=True)
+    oldest = time.time() - 100 * len(names)
+    for i, name in enumerate(names):
+        photo = media_dir / name
+        photo.write_bytes(b"old_photo")
+        os.utime(photo, (oldest + 100 * i, oldest + 100 * i))
+
+
+def _record_path_calls(
+    monkeypatch: pytest.MonkeyPatch, *methods: str
+) -> list[tuple[str, str]]:
+    """Give the button a real Path class that records calls to the given methods.
+
+    Returns the list that (method, file name) pairs are appended to.
+    """
+    calls: list[tuple[str, str]] = []
+
+    def recorder(method: str) -> Callable[..., Any]:
+        def record(self: Path, *args: Any, **kwargs: Any) -> Any:
+            calls.append((method, self.name))
+            return getattr(super(recording_path, self), method)(*args, **kwargs)
+
+        return record
+
+    recording_path = type(
+        "RecordingPath", (type(Path()),), {m: recorder(m) for m in methods}
+    )
+    monkeypatch.setattr("custom_components.fmd.button.Path", recording_path)
+    return calls
+
+
+async def test_download_photos_button(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
 ) -> None:
-    """Test download photos with auto-cleanup enabled."""
-    # Mock device() to return the mock device
-    mock_device = mock_fmd_api.create.return_value.device.return_value
+    """Test download photos button with new picture API (fmd_api 2.0.4+)."""
+    images = (b"fake_jpeg_data_1_unique", b"fake_jpeg_data_2_different")
+    # Return two picture blobs
+    mock_device.get_picture_blobs.return_value = [picture_blob(i) for i in images]
 
-    # Return one picture blob
-    mock_device.get_picture_blobs.return_value = ["encrypted_blob_1"]
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    # Mock decode_picture to return PhotoResult
-    photo_result = MagicMock()
-    photo_result.data = b"fake_jpeg_data_cleanup_test"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = datetime(2025, 10, 23, 12, 0, 0)
-    photo_result.raw = {}
-    mock_device.decode_picture.return_value = photo_result
+    # Verify get_picture_blobs was called on device
+    mock_device.get_picture_blobs.assert_called_once()
+    # Verify 2 photos were decrypted and written under their content hashes
+    assert len(decrypted_pictures) == 2
+    assert sorted(
+        p.name for p in (media_root / "fmd" / "test_user").iterdir()
+    ) == sorted(f"photo_{_photo_content_hash(image)}.jpg" for image in images)
 
-    # Setup integration BEFORE patching Path methods
-    await setup_integration(hass, mock_fmd_api)
+
+async def test_download_photos_with_cleanup(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+) -> None:
+    """Test download photos with auto-cleanup enabled."""
+    # Return one picture blob
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(b"fake_jpeg_data_cleanup_test")
+    ]
 
     # Set max photos to 3
     await hass.services.async_call(
@@ -115,96 +174,55 @@ async def test_download_photos_with_cleanup(
         blocking=True,
     )
 
-    # Create mock old photos (4 old photos + will add 1 new = 5 total,
-    # limit is 3, so 2 should be deleted)
-    old_photos = []
-    for i in range(4):
-        photo = MagicMock()
-        photo.stat.return_value.st_mtime = (
-            datetime.now() - timedelta(days=i + 1)
-        ).timestamp()
-        photo.name = f"old_photo_{i}.jpg"
-        old_photos.append(photo)
-
-    # The new photo that will be downloaded
-    new_photo = MagicMock()
-    new_photo.stat.return_value.st_mtime = datetime.now().timestamp()
-    new_photo.name = "new_photo.jpg"
-
-    # Use a callable for exists() that returns True for directories, False for photo files
-    def exists_side_effect(self):
-        return "photo_" not in str(self)
-
-    # Now patch only for the photo download operation
-    with patch("pathlib.Path.mkdir"), patch("pathlib.Path.write_bytes"), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.exists", exists_side_effect), patch(
-        "pathlib.Path.glob"
-    ) as mock_glob:
-        # glob returns all photos (4 old + 1 new = 5) when cleanup runs
-        mock_glob.return_value = old_photos + [new_photo]
-
-        # Mock async_add_executor_job to actually execute the callable
-        async def mock_executor_job(func, *args):
-            return func(*args)
-
-        with patch.object(
-            hass, "async_add_executor_job", side_effect=mock_executor_job
-        ):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-
-            # Verify the 2 oldest photos were deleted
-            old_photos[3].unlink.assert_called_once()
-            old_photos[2].unlink.assert_called_once()
-            # Ensure photos 0 and 1 were NOT deleted (they are newer)
-            old_photos[0].unlink.assert_not_called()
-            old_photos[1].unlink.assert_not_called()
+    # 4 old photos + 1 new download = 5 total, limit is 3, so 2 should be deleted
+    media_dir = media_root / "fmd" / "test_user"
+    _write_old_photos(media_dir, [f"old_photo_{i}.jpg" for i in range(4)])
+
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+
+    # The 2 oldest photos were deleted; the newer ones and the download remain
+    remaining = sorted(p.name for p in media_dir.iterdir())
+    assert remaining[:2] == ["old_photo_2.jpg", "old_photo_3.jpg"]
+    assert len(remaining) == 3
+    assert remaining[2].endswith(
+        f"_{_photo_content_hash(b'fake_jpeg_data_cleanup_test')}.jpg"
+    )
 
 
 async def test_download_photos_empty_result(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Test download photos button with empty result."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Return empty list
-    mock_fmd_api.create.return_value.get_pictures.return_value = []
-
+    # mock_device returns no picture blobs by default
     await hass.services.async_call(
         "button",
         "press",
         {"entity_id": "button.fmd_test_user_photo_download"},
         blocking=True,
     )
-    await hass.async_block_till_done()
+
+    mock_device.get_picture_blobs.assert_awaited_once()
 
     # Sensor should have count of 0
-    sensor = hass.data["fmd"][list(hass.data["fmd"].keys())[0]]["photo_count_sensor"]
+    sensor = get_entry_data(hass)["photo_count_sensor"]
     assert sensor._last_download_count == 0
 
 
 async def test_download_photos_cleanup_noop_no_warnings(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
     caplog,
 ) -> None:
     """No cleanup warnings should be logged when count <= max_to_retain."""
-    import base64
-
-    mock_fmd_api.create.return_value.get_pictures.return_value = [
-        base64.b64encode(b"jpeg_data").decode()
-    ]
-    mock_fmd_api.create.return_value.decrypt_data_blob.return_value = base64.b64encode(
-        b"jpeg_data"
-    ).decode()
-
-    await setup_integration(hass, mock_fmd_api)
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"new_photo")]
 
     # Set retention higher than existing count
     await hass.services.async_call(
@@ -221,489 +239,286 @@ async def test_download_photos_cleanup_noop_no_warnings(
         blocking=True,
     )
 
-    photos = [MagicMock(), MagicMock()]
-
-    def exists_side_effect(self):
-        return "photo_" not in str(self)
+    media_dir = media_root / "fmd" / "test_user"
+    _write_old_photos(media_dir, ["photo_a.jpg", "photo_b.jpg"])
 
     caplog.clear()
-    with patch("pathlib.Path.mkdir"), patch("pathlib.Path.write_bytes"), patch(
-        "pathlib.Path.is_dir",
-        return_value=True,
-    ), patch("pathlib.Path.exists", exists_side_effect), patch(
-        "pathlib.Path.glob",
-        return_value=photos,
-    ):
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-        async def mock_executor_job(func, *args):
-            return func(*args)
-
-        with patch.object(
-            hass, "async_add_executor_job", side_effect=mock_executor_job
-        ):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
-
-    # Ensure no AUTO-CLEANUP warning entries present
+    # The photo was downloaded, so cleanup ran, but without any warnings
+    assert len(decrypted_pictures) == 1
+    assert len(list(media_dir.glob("*.jpg"))) == 3
     assert not any(
         "AUTO-CLEANUP" in r.getMessage() and r.levelname == "WARNING"
         for r in caplog.records
     )
 
 
-async def test_download_photos_exif_present_but_no_timestamp_tags(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-    tmp_path,
+@pytest.mark.no_autouse_setup
+@pytest.mark.parametrize(
+    ("exif_tags", "timestamp"),
+    [
+        # DateTimeOriginal (36867) is preferred over the other tags
+        (
+            {
+                36867: "2025:01:15 10:30:45",
+                36868: "2025:01:16 11:00:00",
+                306: "2025:01:17 12:00:00",
+            },
+            "20250115_103045",
+        ),
+        # DateTimeDigitized (36868) when DateTimeOriginal is absent
+        ({36868: "2025:02:20 14:15:30", 306: "2025:02:21 15:00:00"}, "20250220_141530"),
+        # DateTime (306) as the last resort
+        ({306: "2025:03:10 09:45:12"}, "20250310_094512"),
+        # Whitespace and null bytes around the value are stripped
+        ({36867: "  2025:04:05 16:20:30\x00\x00  "}, "20250405_162030"),
+        # EXIF present but no datetime tags: hash-only filename
+        ({1234: "something"}, None),
+    ],
+    ids=["original", "digitized", "datetime", "whitespace_and_nulls", "no_tags"],
+)
+def test_photo_filename_from_exif(
+    exif_tags: dict[int, str], timestamp: str | None
 ) -> None:
-    """With EXIF present but no datetime tags, fallback filename used."""
-
-    # Setup integration first
-    await setup_integration(hass, mock_fmd_api)
-
-    # Mock new API
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"encrypted_photo"]
-
-    photo_result = MagicMock()
-    photo_result.data = b"img_no_tags"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None  # No timestamp
-    photo_result.raw = {}
-    device_mock.decode_picture.return_value = photo_result
-
-    # Make hass.config.path return tmp dir
-    with patch.object(hass.config, "path", return_value=str(tmp_path)):
-        # Mock /media path doesn't exist
-        with patch("pathlib.Path.is_dir") as mock_is_dir:
-            # /media doesn't exist, so config/media is used
-            mock_is_dir.return_value = False
-
-            # Mock Path.mkdir and write_bytes
-            with patch("pathlib.Path.mkdir"), patch(
-                "pathlib.Path.exists", return_value=False
-            ), patch("pathlib.Path.write_bytes"):
-
-                class DummyImg:
-                    def getexif(self):
-                        # EXIF present but no datetime tags
-                        return {1234: "something"}
-
-                with patch("PIL.Image.open", return_value=DummyImg()):
-                    await hass.services.async_call(
-                        "button",
-                        "press",
-                        {"entity_id": "button.fmd_test_user_photo_download"},
-                        blocking=True,
-                    )
-                    await hass.async_block_till_done()
-
-    # Verify API calls were made
-    device_mock.get_picture_blobs.assert_called()
-    device_mock.decode_picture.assert_called()
+    """A photo is named after its EXIF capture time, if it has one."""
+    content_hash = _photo_content_hash(b"img")
 
+    with patch(
+        "custom_components.fmd.button.read_exif_text_tags", return_value=exif_tags
+    ):
+        filename = _photo_filename(0, b"img", OrderedDict())
 
-async def test_download_photos_decode_failure(
+    if timestamp:
+        assert filename == f"photo_{timestamp}_{content_hash}.jpg"
+    else:
+        assert filename == f"photo_{content_hash}.jpg"
+
+
+async def test_download_photos_named_from_exif(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    media_root: Path,
 ) -> None:
-    """Test photo download handles decode failure for one photo."""
-    await setup_integration(hass, mock_fmd_api)
+    """A downloaded JPEG is named after its EXIF capture time."""
+    image = _make_exif_jpeg("2025:01:15 10:30:45")
+    mock_device.get_picture_blobs.return_value = [picture_blob(image)]
+
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1", b"blob2"]
+    assert [p.name for p in (media_root / "fmd" / "test_user").iterdir()] == [
+        f"photo_20250115_103045_{_photo_content_hash(image)}.jpg"
+    ]
 
-    # First decode succeeds, second fails
-    photo_result1 = MagicMock()
-    photo_result1.data = b"img1"
-    photo_result1.mime_type = "image/jpeg"
-    photo_result1.timestamp = None
-    photo_result1.raw = {}
 
-    device_mock.decode_picture.side_effect = [photo_result1, Exception("decode failed")]
+async def test_download_photos_decode_failure(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
+) -> None:
+    """Test photo download handles decode failure for one photo."""
+    # The second blob decrypts to bytes that are not base64 text
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(b"img1"),
+        encrypt_blob(b"\xff"),
+    ]
 
-    with patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch("pathlib.Path.write_bytes"):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    # Should have attempted to decode both
-    assert device_mock.decode_picture.call_count == 2
+    # Should have attempted to decrypt both, saving only the first
+    assert len(decrypted_pictures) == 2
+    assert [p.name for p in (media_root / "fmd" / "test_user").glob("*.jpg")] == [
+        f"photo_{_photo_content_hash(b'img1')}.jpg"
+    ]
 
 
 async def test_download_photos_sensor_update_fallback(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    media_root: Path,
 ) -> None:
     """Test photo download when photo count sensor is missing."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"encrypted_photo"]
-
-    photo_result = MagicMock()
-    photo_result.data = b"img_data"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    photo_result.raw = {}
-    device_mock.decode_picture.return_value = photo_result
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"img_data")]
 
     # Remove photo_count_sensor from hass.data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id].pop("photo_count_sensor", None)
+    get_entry_data(hass).pop("photo_count_sensor", None)
 
-    with patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch("pathlib.Path.write_bytes"):
-        # Should not raise, just skip sensor update
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
+    # Should not raise, just skip sensor update
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    device_mock.get_picture_blobs.assert_called()
+    mock_device.get_picture_blobs.assert_called()
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 1
 
 
 async def test_download_photos_media_directory_creation_failure(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
 ) -> None:
     """Test download photos button handles media directory creation failure."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"encrypted_photo"]
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"img_data")]
 
-    photo_result = MagicMock()
-    photo_result.data = b"img_data"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    photo_result.raw = {}
-    device_mock.decode_picture.return_value = photo_result
+    # A file where the fmd folder should be makes the device folder uncreatable
+    (media_root / "fmd").write_bytes(b"")
 
-    # Mock Path.mkdir to raise OSError
-    with patch("pathlib.Path.mkdir", side_effect=OSError("Permission denied")), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ):
-        # Should not raise, just return early after directory creation failure
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
+    # Should not raise, just return early after directory creation failure
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    # Should have attempted to get pictures but not decode since directory creation failed
-    device_mock.get_picture_blobs.assert_called_once()
-    device_mock.decode_picture.assert_not_called()
+    # Should have fetched pictures but not decrypted them, since mkdir failed
+    mock_device.get_picture_blobs.assert_called_once()
+    assert not decrypted_pictures
+    assert (media_root / "fmd").is_file()
 
 
 async def test_download_photos_duplicate_detection(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
 ) -> None:
-    """Second identical photo is skipped as duplicate (exists())."""
-    await setup_integration(hass, mock_fmd_api)
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1", b"blob2"]
-
-    # Two PhotoResults with identical data -> same hash
-    pr1 = MagicMock()
-    pr1.data = b"IDENTICAL_DATA"
-    pr1.mime_type = "image/jpeg"
-    pr1.timestamp = None
-    pr1.raw = {}
-    pr2 = MagicMock()
-    pr2.data = b"IDENTICAL_DATA"
-    pr2.mime_type = "image/jpeg"
-    pr2.timestamp = None
-    pr2.raw = {}
-    device_mock.decode_picture.side_effect = [pr1, pr2]
-
-    # exists() should return False for first file creation, True for second (duplicate)
-    first_call = {"done": False}
-
-    def exists_side_effect(self):
-        # Directories -> True, files containing photo_ -> first False then True
-        if "photo_" not in str(self):
-            return True
-        if not first_call["done"]:
-            first_call["done"] = True
-            return False
-        return True
-
-    with patch("pathlib.Path.is_dir", return_value=True), patch(
-        "pathlib.Path.mkdir"
-    ), patch("pathlib.Path.exists", exists_side_effect), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
-
-    # Only first photo written
-    assert mock_write.call_count == 1
-
+    """Second identical photo in one batch is skipped as a duplicate."""
+    # Two distinct blobs with identical image data -> same filename
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(b"IDENTICAL_DATA"),
+        picture_blob(b"IDENTICAL_DATA"),
+    ]
 
-async def test_download_photos_exif_open_failure(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """EXIF extraction failure (Image.open raises) uses hash-only filename path."""
-    await setup_integration(hass, mock_fmd_api)
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1"]
-    pr = MagicMock()
-    pr.data = b"NO_EXIF_IMAGE"
-    pr.mime_type = "image/jpeg"
-    pr.timestamp = None
-    pr.raw = {}
-    device_mock.decode_picture.return_value = pr
-
-    with patch("PIL.Image.open", side_effect=RuntimeError("exif boom")), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    # File written despite EXIF failure
-    assert mock_write.call_count == 1
+    # Both decrypted, only the first photo written
+    assert len(decrypted_pictures) == 2
+    assert [p.name for p in (media_root / "fmd" / "test_user").iterdir()] == [
+        f"photo_{_photo_content_hash(b'IDENTICAL_DATA')}.jpg"
+    ]
 
 
-async def test_download_photos_exif_datetimeoriginal_used_first(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """When EXIF has DateTimeOriginal (36867), it's used and other tags ignored."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1"]
-
-    pr = MagicMock()
-    pr.data = b"IMG_WITH_EXIF"
-    pr.mime_type = "image/jpeg"
-    pr.timestamp = None  # Force EXIF fallback
-    pr.raw = {}
-    device_mock.decode_picture.return_value = pr
-
-    # Create mock image with EXIF containing DateTimeOriginal (36867)
-    class MockImg:
-        def getexif(self):
-            # Include all three tags - DateTimeOriginal should be preferred
-            return {
-                36867: "2025:01:15 10:30:45",  # DateTimeOriginal
-                36868: "2025:01:16 11:00:00",  # DateTimeDigitized
-                306: "2025:01:17 12:00:00",  # DateTime
-            }
-
-    with patch("PIL.Image.open", return_value=MockImg()), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+@pytest.mark.no_autouse_setup
+def test_scan_photo_names(tmp_path) -> None:
+    """Directory scan returns file names only, and nothing for a missing dir."""
+    (tmp_path / "photo_a.jpg").write_bytes(b"a")
+    (tmp_path / "subdir").mkdir()
 
-    # Verify file was written (EXIF timestamp extraction logged)
-    assert mock_write.call_count == 1
+    assert _scan_photo_names(tmp_path) == {"photo_a.jpg"}
+    assert _scan_photo_names(tmp_path / "missing") == set()
 
 
-async def test_download_photos_exif_digitized_when_original_missing(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """When DateTimeOriginal absent but DateTimeDigitized present, use it."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1"]
-
-    pr = MagicMock()
-    pr.data = b"IMG_DIGITIZED"
-    pr.mime_type = "image/jpeg"
-    pr.timestamp = None
-    pr.raw = {}
-    device_mock.decode_picture.return_value = pr
-
-    class MockImg:
-        def getexif(self):
-            # Only DateTimeDigitized and DateTime present
-            return {
-                36868: "2025:02:20 14:15:30",
-                306: "2025:02:21 15:00:00",
-            }
-
-    with patch("PIL.Image.open", return_value=MockImg()), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+@pytest.mark.no_autouse_setup
+def test_blob_hash_fingerprints_prefix_and_length() -> None:
+    """Blob fingerprint covers the leading bytes and the total length."""
+    head = b"h" * 65536
 
-    # Verify file was written (EXIF timestamp extraction logged)
-    assert mock_write.call_count == 1
+    assert _blob_hash(head + b"tail_a") == _blob_hash(head + b"tail_b")
+    assert _blob_hash(head + b"tail") != _blob_hash(head + b"longer_tail")
+    assert _blob_hash(b"blob_a") != _blob_hash(b"blob_b")
+    assert _blob_hash("encrypted_blob") == _blob_hash(b"encrypted_blob")
 
 
-async def test_download_photos_exif_datetime_fallback(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+async def test_existing_photo_names_cached_until_mtime_changes(
+    hass: HomeAssistant,
+    tmp_path,
+    download_button: FmdDownloadPhotosButton,
 ) -> None:
-    """When only DateTime (306) present, use it as last resort."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1"]
-
-    pr = MagicMock()
-    pr.data = b"IMG_DATETIME_ONLY"
-    pr.mime_type = "image/jpeg"
-    pr.timestamp = None
-    pr.raw = {}
-    device_mock.decode_picture.return_value = pr
-
-    class MockImg:
-        def getexif(self):
-            # Only DateTime tag
-            return {306: "2025:03:10 09:45:12"}
-
-    with patch("PIL.Image.open", return_value=MockImg()), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
-
-    # Verify file was written (EXIF timestamp extraction logged)
-    assert mock_write.call_count == 1
-
+    """Directory listing is reused until the directory mtime changes."""
+    list_names = download_button._existing_photo_names
+    (tmp_path / "photo_a.jpg").write_bytes(b"a")
+    os.utime(tmp_path, ns=(1_000, 1_000))
+
+    with patch(
+        "custom_components.fmd.button._scan_photo_names",
+        side_effect=_scan_photo_names,
+    ) as mock_scan:
+        assert await hass.async_add_executor_job(list_names, tmp_path) == {
+            "photo_a.jpg"
+        }
+        assert await hass.async_add_executor_job(list_names, tmp_path) == {
+            "photo_a.jpg"
+        }
+        assert mock_scan.call_count == 1
+
+        (tmp_path / "photo_b.jpg").write_bytes(b"b")
+        os.utime(tmp_path, ns=(2_000, 2_000))
+        assert await hass.async_add_executor_job(list_names, tmp_path) == {
+            "photo_a.jpg",
+            "photo_b.jpg",
+        }
+        assert mock_scan.call_count == 2
+
+
+@pytest.mark.no_autouse_setup
+def test_photo_filename_exif_failure(caplog: pytest.LogCaptureFixture) -> None:
+    """If the EXIF reader raises, log a warning and use the hash-only name."""
+    caplog.set_level(logging.WARNING)
 
-async def test_download_photos_exif_with_whitespace_and_nulls(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """EXIF datetime value with whitespace and null bytes is cleaned."""
-    await setup_integration(hass, mock_fmd_api)
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.return_value = [b"blob1"]
-
-    pr = MagicMock()
-    pr.data = b"IMG_DIRTY_EXIF"
-    pr.mime_type = "image/jpeg"
-    pr.timestamp = None
-    pr.raw = {}
-    device_mock.decode_picture.return_value = pr
-
-    class MockImg:
-        def getexif(self):
-            # DateTime with extra whitespace and null bytes
-            return {36867: "  2025:04:05 16:20:30\x00\x00  "}
-
-    with patch("PIL.Image.open", return_value=MockImg()), patch(
-        "pathlib.Path.is_dir", return_value=True
-    ), patch("pathlib.Path.mkdir"), patch(
-        "pathlib.Path.exists", return_value=False
-    ), patch(
-        "pathlib.Path.write_bytes"
-    ) as mock_write:
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_photo_download"},
-            blocking=True,
-        )
+    with patch(
+        "custom_components.fmd.button.read_exif_text_tags",
+        side_effect=RuntimeError("exif boom"),
+    ):
+        filename = _photo_filename(0, b"NO_EXIF_IMAGE", OrderedDict())
 
-    # Verify file was written (EXIF timestamp extraction logged)
-    assert mock_write.call_count == 1
+    assert filename == f"photo_{_photo_content_hash(b'NO_EXIF_IMAGE')}.jpg"
+    assert log_contains(caplog, "Could not extract EXIF timestamp")
 
 
 async def test_cleanup_old_photos_deletes_oldest(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, tmp_path: Path
+    media_root: Path, download_button: FmdDownloadPhotosButton
 ) -> None:
     """Cleanup should delete oldest photos when count exceeds the limit."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Prepare a fake media directory under hass config path
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-
-    # Use hass.config.path('media') base and create fmd subdir
-    media_dir = (
-        Path(hass.config.path("media"))
-        / "fmd"
-        / hass.data[DOMAIN][entry_id]["device_info"]["name"].split()[1]
-    )
-    media_dir.mkdir(parents=True, exist_ok=True)
-
-    # Clean up any existing jpg files that may have been created by other tests
-    for existing in media_dir.glob("*.jpg"):
-        existing.unlink()
+    media_dir = media_root / "fmd" / "test_user"
+    media_dir.mkdir(parents=True)
 
     # Create 4 dummy photo files with increasing modification times
-    files = []
     for i in range(4):
         f = media_dir / f"photo_old_{i}.jpg"
-        f.write_bytes(b"testdata%d" % i)
-        # Set mtime progressively older
+        fd = os.open(f, os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644)
+        os.write(fd, b"testdata%d" % i)
+        # Set mtime progressively older (fd-based utime avoids a second path lookup)
         ts = time.time() - (100 * (4 - i))
-        os.utime(f, (ts, ts))
-        files.append(f)
+        os.utime(fd, (ts, ts))
+        os.close(fd)
 
-    # Create a button instance to call cleanup directly
-    # Construct a fake entry object to pass to button
-    mock_entry = hass.config_entries.async_entries(domain=DOMAIN)[0]
-    button = FmdDownloadPhotosButton(hass, mock_entry)
+    download_button._known_blobs[_blob_hash(b"old")] = "photo_old_0.jpg"
+    download_button._known_blobs[_blob_hash(b"new")] = "photo_old_3.jpg"
 
     # Now call the cleanup to retain only 2 files
-    await button._cleanup_old_photos(media_dir, 2)
+    await download_button._cleanup_old_photos(media_dir, 2)
 
-    # Only 2 files should remain
+    # Only the two newest remain (highest indices in our create loop)
     remaining = sorted(p.name for p in media_dir.glob("*.jpg"))
-    assert len(remaining) == 2
-
-    # Ensure the two newest remain (highest indices in our create loop)
-    assert "photo_old_3.jpg" in remaining
-    assert "photo_old_2.jpg" in remaining
+    assert remaining == ["photo_old_2.jpg", "photo_old_3.jpg"]
+    # The deleted photo's blob is forgotten, the kept one's is not
+    assert download_button._known_blobs == {_blob_hash(b"new"): "photo_old_3.jpg"}
 
 
 @pytest.mark.parametrize(
@@ -713,14 +528,16 @@ async def test_cleanup_old_photos_deletes_oldest(
         (OperationError, "Photo download failed"),
         (FmdApiException, "Photo download failed"),
     ],
+    ids=["auth", "op", "fmd"],
 )
 async def test_download_photos_outer_known_errors(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, exc_cls, msg_contains
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    exc_cls,
+    msg_contains,
 ) -> None:
     """device.get_picture_blobs raising specific exceptions maps to HomeAssistantError paths."""
-    await setup_integration(hass, mock_fmd_api)
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.side_effect = exc_cls("boom")
+    mock_device.get_picture_blobs.side_effect = exc_cls("boom")
 
     with pytest.raises(HomeAssistantError, match=msg_contains):
         await hass.services.async_call(
@@ -732,12 +549,10 @@ async def test_download_photos_outer_known_errors(
 
 
 async def test_download_photos_outer_generic_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant, mock_device: SimpleNamespace
 ) -> None:
     """Generic unexpected exception path maps to HomeAssistantError."""
-    await setup_integration(hass, mock_fmd_api)
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.get_picture_blobs.side_effect = RuntimeError("unexpected")
+    mock_device.get_picture_blobs.side_effect = RuntimeError("unexpected")
 
     with pytest.raises(HomeAssistantError, match="Photo download failed"):
         await hass.services.async_call(
@@ -749,237 +564,135 @@ async def test_download_photos_outer_generic_error(
 
 
 async def test_download_photos_cleanup_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Test photo cleanup logs error when deletion fails."""
-    await setup_integration(hass, mock_fmd_api)
+    entry_data = get_entry_data(hass)
 
     # Mock the switch entity to return True for is_on
     mock_switch = MagicMock()
     mock_switch.is_on = True
-    hass.data[DOMAIN]["test_entry_id"]["photo_auto_cleanup_switch"] = mock_switch
+    entry_data["photo_auto_cleanup_switch"] = mock_switch
 
     # Mock max photos number to 1 so we trigger cleanup with 2 photos
     mock_number = MagicMock()
     mock_number.native_value = 1
-    hass.data[DOMAIN]["test_entry_id"]["max_photos_number"] = mock_number
-
-    # Mock Device to return blobs
-    with patch("custom_components.fmd.button.Device") as mock_device_cls:
-        mock_device = mock_device_cls.return_value
-        mock_device.get_picture_blobs = AsyncMock(return_value=[b"1", b"2"])
-
-        mock_photo_result = MagicMock()
-        mock_photo_result.data = b"image_data"
-        mock_photo_result.mime_type = "image/jpeg"
-        mock_photo_result.timestamp = None
-        mock_device.decode_picture = AsyncMock(return_value=mock_photo_result)
-
-        # Mock Path
-        with patch("custom_components.fmd.button.Path") as mock_path_cls:
-            mock_base = MagicMock()
-            mock_base.exists.return_value = True
-            mock_base.is_dir.return_value = True
-            mock_path_cls.return_value = mock_base
-
-            mock_fmd = MagicMock()
-            mock_base.__truediv__.return_value = mock_fmd
-
-            mock_media_dir = MagicMock()
-            mock_fmd.__truediv__.return_value = mock_media_dir
-
-            # Create mock photos
-            mock_photo1 = MagicMock()
-            mock_photo1.stat.return_value.st_mtime = 100
-            mock_photo1.name = "photo1.jpg"
-            # unlink raises exception
-            mock_photo1.unlink.side_effect = Exception("Delete failed")
-
-            mock_photo2 = MagicMock()
-            mock_photo2.stat.return_value.st_mtime = 200
-            mock_photo2.name = "photo2.jpg"
-
-            # glob returns list of photos
-            mock_media_dir.glob.return_value = [mock_photo1, mock_photo2]
-
-            # Trigger download
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-
-            # Verify error log
-            assert "Failed to delete photo photo1.jpg: Delete failed" in caplog.text
+    entry_data["max_photos_number"] = mock_number
+
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"image_data")]
+
+    # The oldest "photo" is a directory, which unlink() cannot delete
+    media_dir = media_root / "fmd" / "test_user"
+    undeletable = media_dir / "photo1.jpg"
+    undeletable.mkdir(parents=True)
+    os.utime(undeletable, (100, 100))
+
+    # Trigger download
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+
+    # Verify error log; the download is kept next to the undeletable entry
+    assert "Failed to delete photo photo1.jpg" in caplog.text
+    assert undeletable.is_dir()
+    assert len(list(media_dir.glob("photo_*.jpg"))) == 1
 
 
 async def test_download_photos_cleanup_outer_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
-    """Test photo cleanup handles outer exception (e.g. glob failure)."""
-    await setup_integration(hass, mock_fmd_api)
+    """Test photo cleanup handles outer exception (e.g. stat failure)."""
+    entry_data = get_entry_data(hass)
 
     # Mock the switch entity to return True for is_on
     mock_switch = MagicMock()
     mock_switch.is_on = True
-    hass.data[DOMAIN]["test_entry_id"]["photo_auto_cleanup_switch"] = mock_switch
+    entry_data["photo_auto_cleanup_switch"] = mock_switch
 
     # Mock max photos number
     mock_number = MagicMock()
     mock_number.native_value = 1
-    hass.data[DOMAIN]["test_entry_id"]["max_photos_number"] = mock_number
-
-    # Mock Device to return blobs
-    with patch("custom_components.fmd.button.Device") as mock_device_cls:
-        mock_device = mock_device_cls.return_value
-        mock_device.get_picture_blobs = AsyncMock(return_value=[b"1"])
-        mock_device.decode_picture = AsyncMock(
-            return_value=MagicMock(data=b"img", mime_type="image/jpeg", timestamp=None)
-        )
+    entry_data["max_photos_number"] = mock_number
 
-        # Mock Path
-        with patch("custom_components.fmd.button.Path") as mock_path_cls:
-            mock_base = MagicMock()
-            mock_base.exists.return_value = True
-            mock_base.is_dir.return_value = True
-            mock_path_cls.return_value = mock_base
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"img")]
 
-            mock_fmd = MagicMock()
-            mock_base.__truediv__.return_value = mock_fmd
+    # A dangling symlink matches *.jpg but cannot be stat'ed when sorting by age
+    media_dir = media_root / "fmd" / "test_user"
+    media_dir.mkdir(parents=True)
+    (media_dir / "broken.jpg").symlink_to(media_dir / "missing.jpg")
 
-            mock_media_dir = MagicMock()
-            mock_fmd.__truediv__.return_value = mock_media_dir
-
-            # glob raises exception
-            mock_media_dir.glob.side_effect = Exception("Glob failed")
-
-            # Trigger download
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
+    # Trigger download
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-            # Verify error log
-            assert "Error during photo cleanup: Glob failed" in caplog.text
+    # Verify error log; the downloaded photo is kept
+    assert "Error during photo cleanup" in caplog.text
+    assert len(list(media_dir.glob("photo_*.jpg"))) == 1
 
 
-async def test_photo_download_button_image_processing_success(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test photo download with valid image and fallback to EXIF (timestamp None)."""
-    # Create a fake JPEG image (EXIF path will be attempted because timestamp=None)
-    img = Image.new("RGB", (100, 100), color="red")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    raw_bytes = img_bytes.getvalue()
-
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1"]
-
-    # Return PhotoResult-like object with timestamp=None to force EXIF path
-    photo_result = MagicMock()
-    photo_result.data = raw_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None  # Force EXIF extraction code path
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
-
-    await setup_integration(hass, mock_fmd_api)
-
-    with patch("pathlib.Path.mkdir"):
-        with patch("pathlib.Path.exists", return_value=True):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
-
-    device.get_picture_blobs.assert_called()
-
-
-async def test_photo_download_button_image_no_exif(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test photo download with image that has no EXIF data (still saved)."""
-    img = Image.new("RGB", (100, 100), color="blue")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    raw_bytes = img_bytes.getvalue()
-
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1"]
-
-    photo_result = MagicMock()
-    photo_result.data = raw_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None  # triggers EXIF attempt -> none found
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
-
-    await setup_integration(hass, mock_fmd_api)
-
-    with patch("pathlib.Path.mkdir"):
-        with patch("pathlib.Path.exists", return_value=True):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
-
-    device.get_picture_blobs.assert_called()
-
-
-async def test_photo_download_button_invalid_image_data(
+@pytest.mark.parametrize(
+    ("images", "media_exists"),
+    [
+        # Real JPEG without EXIF data
+        ([_JPEG_BYTES], True),
+        # Corrupted bytes that are not a JPEG (decode succeeds, saved as is)
+        ([b"not_a_real_image"], True),
+        # /media missing, so photos go to the config media folder
+        ([_JPEG_BYTES], False),
+        # Several blobs with the same image in one batch
+        ([_JPEG_BYTES] * 3, True),
+    ],
+    ids=["jpeg_no_exif", "invalid_image", "media_fallback", "multiple_photos"],
+)
+async def test_photo_download_variants(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
+    images: list[bytes],
+    media_exists: bool,
 ) -> None:
-    """Test photo download with invalid image data (decode succeeds, EXIF fails)."""
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1"]
-
-    # Corrupted bytes that PIL cannot parse as JPEG
-    photo_result = MagicMock()
-    photo_result.data = b"not_a_real_image"
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
+    """Photo download decrypts every blob across image and media-path variants."""
+    mock_device.get_picture_blobs.return_value = [picture_blob(i) for i in images]
 
-    await setup_integration(hass, mock_fmd_api)
+    if not media_exists:
+        media_root.rmdir()
 
-    with patch("pathlib.Path.mkdir"):
-        with patch("pathlib.Path.exists", return_value=True):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    device.get_picture_blobs.assert_called()
+    mock_device.get_picture_blobs.assert_called()
+    assert len(decrypted_pictures) == len(images)
+    base = media_root if media_exists else media_root.parent / "config" / "media"
+    # Identical decoded bytes share one content-hash filename
+    assert [p.name for p in (base / "fmd" / "test_user").glob("*.jpg")] == [
+        f"photo_{_photo_content_hash(images[0])}.jpg"
+    ]
 
 
 async def test_photo_download_max_photos_not_found(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Test photo download when max_photos_number entity not found (no API call)."""
-    await setup_integration(hass, mock_fmd_api)
-
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["max_photos_number"] = None
+    get_entry_data(hass)["max_photos_number"] = None
 
     await hass.services.async_call(
         "button",
@@ -987,240 +700,311 @@ async def test_photo_download_max_photos_not_found(
         {"entity_id": "button.fmd_test_user_photo_download"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
-    mock_fmd_api.create.return_value.device.return_value.get_picture_blobs.assert_not_called()
+    mock_device.get_picture_blobs.assert_not_called()
 
 
-async def test_photo_download_media_fallback_path(
+async def test_download_photos_batch_decode_failure_saves_others(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test photo download uses fallback media path when /media doesn't exist."""
-    img = Image.new("RGB", (100, 100), color="green")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    raw_bytes = img_bytes.getvalue()
-
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1"]
-    photo_result = MagicMock()
-    photo_result.data = raw_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
-
-    await setup_integration(hass, mock_fmd_api)
-
-    with patch("pathlib.Path.mkdir"):
-        with patch("pathlib.Path.exists", return_value=False):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
-
-    device.get_picture_blobs.assert_called()
-
-
-async def test_photo_download_multiple_photos(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
+    caplog,
 ) -> None:
-    """Test photo download with multiple blobs decoded sequentially."""
-    img = Image.new("RGB", (100, 100), color="red")
-    img_bytes = io.BytesIO()
-    img.save(img_bytes, format="JPEG")
-    img_bytes.seek(0)
-    raw_bytes = img_bytes.getvalue()
-
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1", b"blob2", b"blob3"]
-
-    # Use side_effect to return a new PhotoResult for each blob
-    def mk_photo_result():
-        pr = MagicMock()
-        pr.data = raw_bytes
-        pr.mime_type = "image/jpeg"
-        pr.timestamp = None  # exercise EXIF path each time
-        pr.raw = {}
-        return pr
-
-    device.decode_picture.side_effect = [
-        mk_photo_result(),
-        mk_photo_result(),
-        mk_photo_result(),
+    """One failed decode in a batch is logged while the other photos are saved."""
+    caplog.set_level(logging.ERROR)
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(b"first"),
+        encrypt_blob(b"\xff"),
+        picture_blob(b"third"),
     ]
 
-    await setup_integration(hass, mock_fmd_api)
-
-    with patch("pathlib.Path.mkdir"):
-        with patch("pathlib.Path.exists", return_value=True):
-            await hass.services.async_call(
-                "button",
-                "press",
-                {"entity_id": "button.fmd_test_user_photo_download"},
-                blocking=True,
-            )
-            await hass.async_block_till_done()
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-    device.get_picture_blobs.assert_called()
+    assert len(decrypted_pictures) == 3
+    saved = sorted(p.name for p in (media_root / "fmd" / "test_user").iterdir())
+    assert len(saved) == 2
+    assert saved[0].endswith(f"_{_photo_content_hash(b'first')}.jpg")
+    assert saved[1].endswith(f"_{_photo_content_hash(b'third')}.jpg")
+    assert log_contains(
+        caplog, "Failed to decrypt/save photo 2: Failed to decode picture blob"
+    )
 
 
 async def test_download_photos_duplicate_skipped(
-    hass: HomeAssistant, mock_fmd_api, tmp_path: Path
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
 ) -> None:
     """If a photo file already exists, it should be skipped (no write)."""
-    device = mock_fmd_api.create.return_value.device.return_value
-    device.get_picture_blobs.return_value = [b"blob1"]
-
-    # Deterministic timestamp so we can pre-create duplicate
     photo_bytes = b"duplicate_test_bytes"
-    photo_result = MagicMock()
-    photo_result.data = photo_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = datetime(2025, 1, 1, 0, 0, 0)
-    photo_result.raw = {}
-    device.decode_picture.return_value = photo_result
+    mock_device.get_picture_blobs.return_value = [picture_blob(photo_bytes)]
 
     # Pre-create the expected filename
-    content_hash = hashlib.sha256(photo_bytes).hexdigest()[:8]
-    expected_filename = f"photo_20250101_000000_{content_hash}.jpg"
+    content_hash = _photo_content_hash(photo_bytes)
+    expected_file = media_root / "fmd" / "test_user" / f"photo_{content_hash}.jpg"
+    expected_file.parent.mkdir(parents=True)
+    expected_file.write_bytes(b"already_here")
 
-    await setup_integration(hass, mock_fmd_api)
-
-    with patch.object(hass.config, "path", return_value=str(tmp_path)):
-        with patch("pathlib.Path.is_dir", return_value=False):
-            media_dir = tmp_path / "fmd" / "test_user"
-            media_dir.mkdir(parents=True, exist_ok=True)
-            (media_dir / expected_filename).write_bytes(b"already_here")
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-            with patch("pathlib.Path.write_bytes") as mock_write:
-                await hass.services.async_call(
-                    "button",
-                    "press",
-                    {"entity_id": "button.fmd_test_user_photo_download"},
-                    blocking=True,
-                )
-                mock_write.assert_not_called()
+    assert expected_file.read_bytes() == b"already_here"
+    assert list(expected_file.parent.iterdir()) == [expected_file]
 
 
-async def test_download_photos_no_photos_found(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog
+async def test_download_photos_collision_keeps_existing_file_unread(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    """When no pictures are found, warn and return."""
-    caplog.set_level(logging.WARNING)
-    await setup_integration(hass, mock_fmd_api)
+    """The content-hash filename is canonical: a collision is never read back.
+
+    A file that already carries the expected name is treated as the same photo,
+    even if its bytes differ, and is neither opened nor overwritten.
+    """
+    photo_bytes = b"collision_test_bytes"
+    mock_device.get_picture_blobs.return_value = [picture_blob(photo_bytes)]
+    media_dir = media_root / "fmd" / "test_user"
+    media_dir.mkdir(parents=True)
+    existing = media_dir / f"photo_{_photo_content_hash(photo_bytes)}.jpg"
+    existing.write_bytes(b"different_bytes")
+    calls = _record_path_calls(monkeypatch, "read_bytes", "open", "write_bytes")
 
-    btn = FmdDownloadPhotosButton(
-        hass, hass.config_entries.async_entries(domain=DOMAIN)[0]
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
     )
 
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = []
+    assert not calls
+    assert existing.read_bytes() == b"different_bytes"
+    assert [p.name for p in media_dir.iterdir()] == [existing.name]
 
-    await btn.async_press()
 
-    assert any("No photos found on server" in rec.message for rec in caplog.records)
+async def test_download_photos_skips_decode_for_known_blob(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
+) -> None:
+    """A blob saved on a previous press is not decrypted again."""
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"known_blob_bytes")]
 
+    for _ in range(2):
+        await hass.services.async_call(
+            "button",
+            "press",
+            {"entity_id": "button.fmd_test_user_photo_download"},
+            blocking=True,
+        )
 
-async def test_download_photos_mkdir_failure_logs_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog, tmp_path: Path
+    assert len(decrypted_pictures) == 1
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 1
+
+
+async def test_download_photos_same_name_after_restart(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    freezer: FrozenDateTimeFactory,
 ) -> None:
-    """If media directory cannot be created, log an error and stop."""
-    caplog.set_level(logging.ERROR)
-    await setup_integration(hass, mock_fmd_api)
+    """A photo downloaded again later, with no blob cache, is not saved twice."""
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"restart_bytes")]
+    media_dir = media_root / "fmd" / "test_user"
+
+    freezer.move_to("2025-10-23 12:00:00")
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
+    saved = sorted(media_dir.iterdir())
 
-    btn = FmdDownloadPhotosButton(
-        hass, hass.config_entries.async_entries(domain=DOMAIN)[0]
+    # A restart forgets the blobs already saved; the clock has moved on too
+    get_entry_data(hass)["known_photo_blobs"].clear()
+    freezer.move_to("2025-10-24 08:30:15")
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
     )
 
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = [b"blob1"]
+    assert [p.name for p in saved] == [
+        f"photo_{_photo_content_hash(b'restart_bytes')}.jpg"
+    ]
+    assert sorted(media_dir.iterdir()) == saved
 
-    # Patch Path.mkdir to raise an exception
-    with patch("pathlib.Path.mkdir", side_effect=Exception("fail mkdir")):
-        await btn.async_press()
 
-    assert any(
-        "Failed to create media directory" in rec.message for rec in caplog.records
+async def test_download_photos_decodes_unique_blobs_only(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    media_root: Path,
+) -> None:
+    """Repeated blobs in one batch are decrypted once and shared via hass.data."""
+    blob_a = picture_blob(b"bytes_blob_a")
+    mock_device.get_picture_blobs.return_value = [
+        blob_a,
+        blob_a,
+        picture_blob(b"bytes_blob_b"),
+    ]
+
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
     )
 
+    assert len(decrypted_pictures) == 2
+    assert len(get_entry_data(hass)["known_photo_blobs"]) == 2
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 2
 
-async def test_download_photos_exif_extraction_failure_logs_warning(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: MagicMock
+
+async def test_dedup_drops_saved_and_repeated_blobs(
+    download_button: FmdDownloadPhotosButton,
 ) -> None:
-    """If EXIF extraction fails, log a warning and continue."""
-    caplog.set_level(logging.WARNING)
-    await setup_integration(hass, mock_fmd_api)
+    """Only blobs that are neither saved nor repeated in the batch are pending."""
+    download_button._known_blobs[_blob_hash(b"saved")] = "photo_saved.jpg"
+    download_button._known_blobs[_blob_hash(b"gone")] = "photo_gone.jpg"
 
-    # Ensure media dir exists
-    media_dir = (
-        Path(hass.config.path("media"))
-        / "fmd"
-        / hass.data[DOMAIN][list(hass.data[DOMAIN].keys())[0]]["device_info"][
-            "name"
-        ].split()[1]
+    pending = download_button._dedup(
+        [b"saved", b"new", b"new", b"gone"], existing={"photo_saved.jpg"}
     )
-    media_dir.mkdir(parents=True, exist_ok=True)
-    # Ensure isolation: remove any leftover photo files from previous tests
-    for existing in media_dir.glob("*.jpg"):
-        existing.unlink()
 
-    btn = FmdDownloadPhotosButton(
-        hass, hass.config_entries.async_entries(domain=DOMAIN)[0]
+    assert pending == [(1, _blob_hash(b"new")), (3, _blob_hash(b"gone"))]
+    # The entry for the photo no longer on disk is dropped as stale
+    assert download_button._known_blobs == {_blob_hash(b"saved"): "photo_saved.jpg"}
+
+
+@pytest.mark.no_autouse_setup
+def test_photo_filename_caches_exif_timestamp() -> None:
+    """Naming the same photo content again does not re-parse its EXIF."""
+    exif_cache: OrderedDict[str, str | None] = OrderedDict()
+    exif_tags = {36867: "2025:10:19 15:00:34"}
+    expected = f"photo_20251019_150034_{_photo_content_hash(b'bytes_a')}.jpg"
+
+    with patch(
+        "custom_components.fmd.button.read_exif_text_tags", return_value=exif_tags
+    ) as mock_read_exif:
+        for idx in range(2):
+            assert _photo_filename(idx, b"bytes_a", exif_cache) == expected
+
+    mock_read_exif.assert_called_once()
+
+
+@pytest.mark.no_autouse_setup
+def test_photo_filename_exif_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The EXIF cache keeps only the most recently used content hashes."""
+    monkeypatch.setattr("custom_components.fmd.button._EXIF_CACHE_SIZE", 2)
+    exif_cache: OrderedDict[str, str | None] = OrderedDict()
+
+    with patch("custom_components.fmd.button.read_exif_text_tags", return_value=None):
+        for image in (b"bytes_a", b"bytes_b", b"bytes_a", b"bytes_c"):
+            _photo_filename(0, image, exif_cache)
+
+    # bytes_b was the least recently used when bytes_c arrived
+    assert list(exif_cache) == [
+        _photo_content_hash(b"bytes_a"),
+        _photo_content_hash(b"bytes_c"),
+    ]
+
+
+async def test_download_photos_no_per_photo_stat(
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    media_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Saving photos never stats the individual photo paths."""
+    mock_device.get_picture_blobs.return_value = [
+        picture_blob(image) for image in (b"bytes_a", b"bytes_b", b"bytes_c")
+    ]
+    calls = _record_path_calls(monkeypatch, "exists")
+
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
     )
 
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = [b"blob1"]
-
-    # Make decode_picture return a result with no timestamp
-    photo_result = MagicMock()
-    photo_bytes = b"imagedata"
-    photo_result.data = photo_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    mock_device.decode_picture.return_value = photo_result
-
-    # Make Image.open to raise when used which should trigger EXIF warning
-    with patch("PIL.Image.open", side_effect=Exception("exif fail")):
-        await btn.async_press()
-
-    assert any(
-        "Could not extract EXIF timestamp" in rec.getMessage()
-        or "Could not extract EXIF timestamp" in rec.message
-        for rec in caplog.records
+    assert len(list((media_root / "fmd" / "test_user").glob("*.jpg"))) == 3
+    assert not [name for _, name in calls if name.startswith("photo_")]
+
+
+async def test_download_photos_no_photos_found(
+    mock_device: SimpleNamespace,
+    caplog,
+    download_button: FmdDownloadPhotosButton,
+) -> None:
+    """When no pictures are found, warn and return."""
+    caplog.set_level(logging.WARNING)
+    mock_device.get_picture_blobs.return_value = []
+
+    await download_button.async_press()
+
+    assert log_contains(caplog, "No photos found on server")
+
+
+async def test_download_photos_mkdir_failure_logs_error(
+    mock_device: SimpleNamespace,
+    decrypted_pictures: list[str],
+    caplog,
+    monkeypatch: pytest.MonkeyPatch,
+    download_button: FmdDownloadPhotosButton,
+) -> None:
+    """If media directory cannot be created, log an error and stop."""
+    caplog.set_level(logging.ERROR)
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"img")]
+    monkeypatch.setattr(
+        download_button,
+        "_mkdir_media_dir",
+        MagicMock(side_effect=OSError("fail mkdir")),
     )
 
+    await download_button.async_press()
+
+    assert log_contains(caplog, "Failed to create media directory")
+    assert not decrypted_pictures
+
 
 async def test_download_photos_write_raises_logs_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog
+    mock_device: SimpleNamespace,
+    caplog,
+    media_root: Path,
+    download_button: FmdDownloadPhotosButton,
 ) -> None:
     """If writing a photo file fails, log an error and continue."""
     caplog.set_level(logging.ERROR)
-    await setup_integration(hass, mock_fmd_api)
+    photo_bytes = b"imagedata2"
+    mock_device.get_picture_blobs.return_value = [picture_blob(photo_bytes)]
 
-    btn = FmdDownloadPhotosButton(
-        hass, hass.config_entries.async_entries(domain=DOMAIN)[0]
+    # A directory holds the photo's file name, so writing the photo fails
+    blocker = (
+        media_root
+        / "fmd"
+        / "test_user"
+        / f"photo_{_photo_content_hash(photo_bytes)}.jpg"
     )
+    blocker.mkdir(parents=True)
 
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = [b"blob1"]
-
-    # Make decode_picture return a result
-    photo_result = MagicMock()
-    photo_bytes = b"imagedata2"
-    photo_result.data = photo_bytes
-    photo_result.mime_type = "image/jpeg"
-    photo_result.timestamp = None
-    mock_device.decode_picture.return_value = photo_result
-
-    # Patch Path.write_bytes to raise
-    with patch("pathlib.Path.write_bytes", side_effect=Exception("write fail")):
-        await btn.async_press()
+    await download_button.async_press()
 
-    assert any("Failed to decrypt/save photo" in rec.message for rec in caplog.records)
+    assert log_contains(caplog, "Failed to decrypt/save photo 1")
+    assert list(blocker.parent.iterdir()) == [blocker]
+    assert blocker.is_dir()
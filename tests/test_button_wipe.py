@@ -1,100 +1,101 @@
 """Test FMD wipe device button entities."""
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
 
 import pytest
 from fmd_api import AuthenticationError, FmdApiException, OperationError
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 
-from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from tests.common import (
+    ENTRY_ID,
+    SAFETY_SWITCH,
+    WIPE_EXECUTE,
+    WIPE_PIN_TEXT,
+    get_entry_data,
+    get_wipe_entities,
+    prime_wipe_state,
+    setup_integration_minimal,
+)
+
+
+@pytest.fixture(autouse=True)
+async def integration(hass: HomeAssistant, mock_fmd_api: AsyncMock) -> SimpleNamespace:
+    """Set up the integration before each wipe test and return its handles."""
+    # The wipe path only touches the tracker, button, switch and text entities
+    await setup_integration_minimal(
+        hass,
+        mock_fmd_api,
+        platforms=(
+            Platform.DEVICE_TRACKER,
+            Platform.BUTTON,
+            Platform.SWITCH,
+            Platform.TEXT,
+        ),
+    )
+    return SimpleNamespace(
+        hass=hass,
+        mock=mock_fmd_api,
+        entry_id=ENTRY_ID,
+        store=get_entry_data(hass),
+    )
 
 
 async def test_wipe_device_button_blocked(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Test wipe device button is blocked without safety switch."""
-    await setup_integration(hass, mock_fmd_api)
-
     await hass.services.async_call(
         "button",
         "press",
-        {"entity_id": "button.fmd_test_user_wipe_device"},
+        {"entity_id": WIPE_EXECUTE},
         blocking=True,
     )
 
     # Should NOT call wipe API
-    mock_fmd_api.create.return_value.wipe_device.assert_not_called()
+    mock_device.wipe.assert_not_called()
 
 
 async def test_wipe_device_button_allowed(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Test wipe device button works with safety switch enabled and PIN set."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, pin, execute = get_wipe_entities(hass)
 
     # Set wipe PIN
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {
-            "entity_id": "text.fmd_test_user_wipe_pin",
-            "value": "MySecureWipePin123",
-        },
-        blocking=True,
-    )
+    await pin.async_set_value("MySecureWipePin123")
 
     # Enable safety switch
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    await safety.async_turn_on()
 
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await execute.async_press()
 
     # Wipe button now uses device.wipe(pin=pin, confirm=True)
-    mock_device = mock_fmd_api.create.return_value.device.return_value
     mock_device.wipe.assert_called_once_with(pin="MySecureWipePin123", confirm=True)
 
 
 async def test_wipe_button_tracker_not_found(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    integration: SimpleNamespace,
 ) -> None:
     """Test wipe button when tracker is not found."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, _, execute = get_wipe_entities(hass)
 
     # Remove tracker from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    integration.store.pop("tracker", None)
 
     # Enable safety
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    await safety.async_turn_on()
 
     # Try wipe
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await execute.async_press()
 
     # Should not call API since tracker not found
     mock_fmd_api.create.return_value.send_command.assert_not_called()
@@ -103,33 +104,22 @@ async def test_wipe_button_tracker_not_found(
 async def test_wipe_button_tracker_not_found_keeps_safety_on(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    integration: SimpleNamespace,
 ) -> None:
     """With safety on but tracker missing, wipe should not run and safety stays on."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, _, execute = get_wipe_entities(hass)
 
     # Enable safety
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await safety.async_turn_on()
 
     # Remove tracker from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    integration.store.pop("tracker", None)
 
     # Try wipe
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await execute.async_press()
 
     mock_fmd_api.create.return_value.send_command.assert_not_called()
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    state = hass.states.get(SAFETY_SWITCH)
     assert state is not None and state.state == "on"
 
 
@@ -138,20 +128,14 @@ async def test_wipe_button_blocked_by_safety(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test wipe button is blocked when safety switch is on."""
-    await setup_integration(hass, mock_fmd_api)
+    _, _, execute = get_wipe_entities(hass)
 
     # Safety is OFF by default (disabled)
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    state = hass.states.get(SAFETY_SWITCH)
     assert state.state == "off"
 
     # Try to wipe with safety off (disabled)
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await execute.async_press()
 
     # Should not call send_command because safety is disabled
     mock_fmd_api.create.return_value.send_command.assert_not_called()
@@ -162,494 +146,230 @@ async def test_wipe_device_button_failure_keeps_safety_on(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """If wipe command returns False, safety should remain on."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, _, execute = get_wipe_entities(hass)
 
     # Enable safety switch
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
+    await safety.async_turn_on()
 
     # Return False from API
     mock_fmd_api.create.return_value.send_command.return_value = False
 
     # Attempt wipe
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
+    await execute.async_press()
     await hass.async_block_till_done()
 
     # Safety should still be ON after failure
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    state = hass.states.get(SAFETY_SWITCH)
     assert state is not None and state.state == "on"
 
 
 async def test_wipe_device_button_auto_disables_safety(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Wipe button should auto-disable safety switch after success."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Set the wipe PIN first
     await hass.services.async_call(
         "text",
         "set_value",
         {
-            "entity_id": "text.fmd_test_user_wipe_pin",
+            "entity_id": WIPE_PIN_TEXT,
             "value": "ValidPin123",
         },
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Enable safety
     await hass.services.async_call(
         "switch",
         "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
+        {"entity_id": SAFETY_SWITCH},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Mock device.wipe to succeed
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.return_value = None
+    mock_device.wipe.return_value = None
 
     # Press wipe execute
     await hass.services.async_call(
         "button",
         "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
+        {"entity_id": WIPE_EXECUTE},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify device.wipe was called with PIN and confirm=True
-    device_mock.wipe.assert_called_once_with(pin="ValidPin123", confirm=True)
+    mock_device.wipe.assert_called_once_with(pin="ValidPin123", confirm=True)
 
     # Safety switch should be turned off by the button
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    state = hass.states.get(SAFETY_SWITCH)
     assert state is not None and state.state == "off"
 
 
-async def test_wipe_device_button_api_error_keeps_safety_on(
+@pytest.mark.parametrize(
+    ("exc", "match"),
+    [
+        (AuthenticationError("auth failed"), "Authentication failed"),
+        (OperationError("connection failed"), "Wipe command failed"),
+        (FmdApiException("API failed"), "Wipe command failed"),
+        (ValueError("unexpected"), "Wipe command failed"),
+        (RuntimeError("wipe failed"), "Wipe command failed"),
+    ],
+    ids=["authentication", "operation", "fmd_api", "unexpected", "runtime"],
+)
+async def test_wipe_button_api_errors(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    exc: Exception,
+    match: str,
+    mock_device: SimpleNamespace,
 ) -> None:
-    """If wipe API raises, safety remains on (only disabled on success)."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Set PIN
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
-
-    # Enable safety
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-    await hass.async_block_till_done()
-
-    # Make device.wipe raise
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.side_effect = RuntimeError("wipe failed")
+    """Wipe API errors raise HomeAssistantError and leave safety on."""
+    safety, pin, execute = get_wipe_entities(hass)
+    await pin.async_set_value("ValidPin123")
+    await safety.async_turn_on()
 
-    # Press wipe execute - should raise HomeAssistantError
-    with pytest.raises(HomeAssistantError):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
+    mock_device.wipe.side_effect = exc
 
-    await hass.async_block_till_done()
+    with pytest.raises(HomeAssistantError, match=match):
+        await execute.async_press()
 
-    # Safety should still be on
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    # Safety is only disabled after a successful wipe
+    state = hass.states.get(SAFETY_SWITCH)
     assert state is not None and state.state == "on"
 
 
-async def test_wipe_device_button_authentication_error(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test wipe button raises HomeAssistantError on AuthenticationError."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Set PIN and enable safety
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.side_effect = AuthenticationError("auth failed")
-
-    with pytest.raises(HomeAssistantError, match="Authentication failed"):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
-
-
-async def test_wipe_device_button_operation_error(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test wipe button raises HomeAssistantError on OperationError."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Set PIN and enable safety
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.side_effect = OperationError("connection failed")
-
-    with pytest.raises(HomeAssistantError, match="Wipe command failed"):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
-
-
-async def test_wipe_device_button_fmd_api_error(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test wipe button raises HomeAssistantError on FmdApiException."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Set PIN and enable safety
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.side_effect = FmdApiException("API failed")
-
-    with pytest.raises(HomeAssistantError, match="Wipe command failed"):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
-
-
-async def test_wipe_device_button_unexpected_error(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test wipe button raises HomeAssistantError on unexpected Exception."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Set PIN and enable safety
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.side_effect = ValueError("unexpected")
-
-    with pytest.raises(HomeAssistantError, match="Wipe command failed"):
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
-
-
 async def test_wipe_button_invalid_pin(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    caplog: pytest.LogCaptureFixture,
+    integration: SimpleNamespace,
 ) -> None:
     """Test wipe button blocks invalid PIN."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Enable safety switch
-    hass.states.async_set("switch.fmd_test_user_wipe_safety_switch", "on")
-
-    # Mock PIN text entity with invalid PIN (contains space)
-    mock_text = MagicMock()
-    mock_text.native_value = "invalid pin"
-    hass.data[DOMAIN]["test_entry_id"]["wipe_pin_text"] = mock_text
+    caplog.set_level(logging.WARNING, logger="custom_components.fmd.button")
+    _, _, execute = get_wipe_entities(hass)
 
-    # Patch Device
-    with patch("custom_components.fmd.button.Device") as mock_device_cls:
-        mock_device = mock_device_cls.return_value
+    # Safety on, PIN contains a space
+    prime_wipe_state(hass, integration.entry_id, pin="invalid pin")
 
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
+    await execute.async_press()
 
-        # Verify wipe was NOT called
-        mock_device.wipe.assert_not_called()
-        assert "Invalid wipe PIN" in caplog.text
+    # Verify wipe was NOT called
+    mock_device.wipe.assert_not_called()
+    assert "Invalid wipe PIN" in caplog.text
 
 
 async def test_wipe_button_missing_pin_entity(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    caplog: pytest.LogCaptureFixture,
+    integration: SimpleNamespace,
 ) -> None:
     """Test wipe button blocks when PIN entity is missing."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Enable safety switch
-    hass.states.async_set("switch.fmd_test_user_wipe_safety_switch", "on")
+    caplog.set_level(logging.WARNING, logger="custom_components.fmd.button")
+    _, _, execute = get_wipe_entities(hass)
 
-    # Remove PIN entity
-    hass.data[DOMAIN]["test_entry_id"].pop("wipe_pin_text", None)
+    prime_wipe_state(hass, integration.entry_id, pin_entity_missing=True)
 
-    # Patch Device
-    with patch("custom_components.fmd.button.Device") as mock_device_cls:
-        mock_device = mock_device_cls.return_value
+    await execute.async_press()
 
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
-
-        # Verify wipe was NOT called
-        mock_device.wipe.assert_not_called()
-        assert "Wipe PIN entity not found" in caplog.text
+    # Verify wipe was NOT called
+    mock_device.wipe.assert_not_called()
+    assert "Wipe PIN entity not found" in caplog.text
 
 
 async def test_wipe_button_empty_pin(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant,
+    mock_device: SimpleNamespace,
+    caplog: pytest.LogCaptureFixture,
+    integration: SimpleNamespace,
 ) -> None:
     """Test wipe button blocks when PIN is empty."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Enable safety switch
-    hass.states.async_set("switch.fmd_test_user_wipe_safety_switch", "on")
-
-    # Mock PIN text entity with empty PIN
-    mock_text = MagicMock()
-    mock_text.native_value = ""
-    hass.data[DOMAIN]["test_entry_id"]["wipe_pin_text"] = mock_text
+    caplog.set_level(logging.WARNING, logger="custom_components.fmd.button")
+    _, _, execute = get_wipe_entities(hass)
 
-    # Patch Device
-    with patch("custom_components.fmd.button.Device") as mock_device_cls:
-        mock_device = mock_device_cls.return_value
+    prime_wipe_state(hass, integration.entry_id, pin="")
 
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_wipe_execute"},
-            blocking=True,
-        )
+    await execute.async_press()
 
-        # Verify wipe was NOT called
-        mock_device.wipe.assert_not_called()
-        assert "Wipe PIN is not set" in caplog.text
+    # Verify wipe was NOT called
+    mock_device.wipe.assert_not_called()
+    assert "Wipe PIN is not set" in caplog.text
 
 
 async def test_wipe_button_invalid_pin_validation_fails(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
 ) -> None:
     """Wipe button with invalid PIN that fails validation."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Enable safety
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    _, pin, _ = get_wipe_entities(hass)
 
     # Set invalid PIN (contains special characters) - text entity will raise ValueError
     with pytest.raises(ValueError, match="alphanumeric"):
-        await hass.services.async_call(
-            "text",
-            "set_value",
-            {"entity_id": "text.fmd_test_user_wipe_pin", "value": "Pin@123!"},
-            blocking=True,
-        )
+        await pin.async_set_value("Pin@123!")
 
 
 async def test_wipe_button_tracker_missing_after_validation(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    integration: SimpleNamespace,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Wipe button when tracker missing after PIN validation."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, pin, execute = get_wipe_entities(hass)
 
     # Enable safety and set valid PIN
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "ValidPin123"},
-        blocking=True,
-    )
+    await safety.async_turn_on()
+    await pin.async_set_value("ValidPin123")
 
     # Remove tracker from hass.data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id].pop("tracker", None)
+    integration.store.pop("tracker", None)
 
     # Try to wipe
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
+    await execute.async_press()
 
     # Should not call wipe API
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.assert_not_called()
+    mock_device.wipe.assert_not_called()
 
 
 async def test_wipe_button_safety_switch_missing_after_success(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    integration: SimpleNamespace,
+    mock_device: SimpleNamespace,
 ) -> None:
     """Wipe succeeds but safety_switch missing when trying to disable it."""
-    await setup_integration(hass, mock_fmd_api)
+    safety, pin, execute = get_wipe_entities(hass)
 
     # Enable safety and set valid PIN
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-    await hass.services.async_call(
-        "text",
-        "set_value",
-        {"entity_id": "text.fmd_test_user_wipe_pin", "value": "SecurePin456"},
-        blocking=True,
-    )
+    await safety.async_turn_on()
+    await pin.async_set_value("SecurePin456")
 
     # Remove safety switch from hass.data before wipe
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id].pop("wipe_safety_switch", None)
+    integration.store.pop("wipe_safety_switch", None)
 
     # Mock successful wipe
-    device_mock = mock_fmd_api.create.return_value.device.return_value
-    device_mock.wipe.return_value = None
+    mock_device.wipe.return_value = None
 
     # Execute wipe - should succeed but not crash when safety_switch missing
-    await hass.services.async_call(
-        "button",
-        "press",
-        {"entity_id": "button.fmd_test_user_wipe_execute"},
-        blocking=True,
-    )
+    await execute.async_press()
 
     # Verify wipe was called
-    device_mock.wipe.assert_called_once_with(pin="SecurePin456", confirm=True)
+    mock_device.wipe.assert_called_once_with(pin="SecurePin456", confirm=True)
 
 
 async def test_switch_wipe_safety_tracker_not_found(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    integration: SimpleNamespace,
 ) -> None:
     """Test wipe safety switch when tracker not found (for logging)."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    integration.store["tracker"] = None
 
     # Turn on the wipe safety switch (should still work, just logs differently)
     await hass.services.async_call(
         "switch",
         "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
+        {"entity_id": SAFETY_SWITCH},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify it's on
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
+    state = hass.states.get(SAFETY_SWITCH)
     assert state.state == "on"
-
-
-async def test_switch_wipe_safety_auto_disable_cancelled_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """Test wipe safety auto-disable handles CancelledError gracefully."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Get the wipe safety switch
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    safety_switch = hass.data[DOMAIN][entry_id]["wipe_safety_switch"]
-
-    # Turn on the switch (starts auto-disable task)
-    await safety_switch.async_turn_on()
-    await hass.async_block_till_done()
-
-    # Verify task was created
-    assert safety_switch._auto_disable_task is not None
-
-    # Turn off the switch (cancels the task)
-    await safety_switch.async_turn_off()
-    await hass.async_block_till_done()
-
-    # Task should be cancelled and set to None
-    assert safety_switch._auto_disable_task is None
-    assert safety_switch.is_on is False
@@ -1,6 +1,8 @@
 """Test FMD config flow."""
 from __future__ import annotations
 
+from collections.abc import Callable, Generator
+from types import MappingProxyType
 from typing import Any
 from unittest.mock import AsyncMock, patch
 
@@ -16,14 +18,66 @@ from custom_components.fmd.config_flow import (
 )
 from custom_components.fmd.const import DEFAULT_POLLING_INTERVAL, DOMAIN
 
+# Read-only so a test cannot leak changes into the next; copy with dict()
+_ARTIFACTS = MappingProxyType(
+    {
+        "base_url": "https://fmd.example.com",
+        "fmd_id": "test_user",
+        "access_token": "mock_access_token",
+        "private_key": "MOCK_KEY",
+        "password_hash": "mock_password_hash",
+        "session_duration": 3600,
+        "token_issued_at": 1234567890.0,
+    }
+)
+_BASE_CREDS = MappingProxyType(
+    {
+        CONF_URL: "https://fmd.example.com",
+        CONF_ID: "test_user",
+        CONF_PASSWORD: "test_password",
+    }
+)
 
-@pytest.mark.asyncio
-async def test_reauth_flow_success(hass: HomeAssistant) -> None:
-    """Test the reauthentication flow succeeds and updates the entry."""
-    entry = MockConfigEntry(
-        domain=DOMAIN,
-        data={"url": "http://test", "id": "user", "password": "oldpass"},
+
+async def _init_flow(hass: HomeAssistant) -> data_entry_flow.FlowResult:
+    """Start a user-initiated config flow and return the first form."""
+    return await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
+
+
+async def _run_user_flow(
+    hass: HomeAssistant, user_input: dict[str, Any]
+) -> data_entry_flow.FlowResult:
+    """Start a user config flow, submit user_input and return the result."""
+    result = await _init_flow(hass)
+    return await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+
+
+def _coro_returning(value: Any) -> Callable[..., Any]:
+    """Return an async function that resolves to value, a light AsyncMock stand-in."""
+
+    async def _coro(*args: Any, **kwargs: Any) -> Any:
+        return value
+
+    return _coro
+
+
+@pytest.fixture
+def mock_auth() -> Generator[AsyncMock, None, None]:
+    """Patch the config flow's authenticate_and_get_artifacts helper."""
+    with patch(
+        "custom_components.fmd.config_flow.authenticate_and_get_artifacts"
+    ) as mock:
+        yield mock
+
+
+async def test_reauth_flow_success(
+    hass: HomeAssistant,
+    make_entry: Callable[..., MockConfigEntry],
+) -> None:
+    """Test the reauthentication flow succeeds and updates the entry."""
+    entry = make_entry()
     entry.add_to_hass(hass)
     entry_id = entry.entry_id
 
@@ -39,7 +93,7 @@ async def test_reauth_flow_success(hass: HomeAssistant) -> None:
     }
     with patch(
         "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        return_value=dummy_artifacts,
+        new=_coro_returning(dummy_artifacts),
     ):
         result = await hass.config_entries.flow.async_init(
             DOMAIN, context={"source": "reauth", "entry_id": entry_id}
@@ -56,79 +110,64 @@ async def test_reauth_flow_success(hass: HomeAssistant) -> None:
                 "password": "newpass",
             },
         )
-        assert result2["type"] == "abort"
-        assert result2["reason"] == "reauth_successful"
+    assert result2["type"] == "abort"
+    assert result2["reason"] == "reauth_successful"
+    assert entry.data["artifacts"] == dummy_artifacts
+    assert CONF_PASSWORD not in entry.data
 
 
-@pytest.mark.asyncio
-async def test_reauth_flow_failure(hass: HomeAssistant) -> None:
+async def test_reauth_flow_failure(
+    hass: HomeAssistant,
+    mock_auth: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
+) -> None:
     """Test the reauthentication flow fails with invalid credentials."""
-    entry = MockConfigEntry(
-        domain=DOMAIN,
-        data={"url": "http://test", "id": "user", "password": "oldpass"},
-    )
+    entry = make_entry()
     entry.add_to_hass(hass)
     entry_id = entry.entry_id
 
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        side_effect=Exception("fail"),
-    ):
-        result = await hass.config_entries.flow.async_init(
-            DOMAIN, context={"source": "reauth", "entry_id": entry_id}
-        )
-        assert result["type"] == "form"
-        assert result["step_id"] == "reauth"
-
-        # Submit invalid credentials
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                "url": "http://test",
-                "id": "user",
-                "password": "badpass",
-            },
-        )
-        assert result2["type"] == "form"
-        assert result2["errors"]["base"] == "cannot_connect"
+    mock_auth.side_effect = Exception
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": "reauth", "entry_id": entry_id}
+    )
+    assert result["type"] == "form"
+    assert result["step_id"] == "reauth"
+
+    # Submit invalid credentials
+    result2 = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "url": "http://test",
+            "id": "user",
+            "password": "badpass",
+        },
+    )
+    assert result2["type"] == "form"
+    assert result2["errors"]["base"] == "cannot_connect"
 
 
-async def test_form(hass: HomeAssistant, mock_fmd_api: AsyncMock) -> None:
+async def test_form(
+    hass: HomeAssistant, mock_setup_entry: AsyncMock, mock_auth: AsyncMock
+) -> None:
     """Test we get the form."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
+    result = await _init_flow(hass)
     assert result["type"] == data_entry_flow.FlowResultType.FORM
     assert result["errors"] == {}
 
-    dummy_artifacts = {
-        "base_url": "https://fmd.example.com",
-        "fmd_id": "test_user",
-        "access_token": "mock_access_token",
-        "private_key": "MOCK_KEY",
-        "password_hash": "mock_password_hash",
-        "session_duration": 3600,
-        "token_issued_at": 1234567890.0,
-    }
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        return_value=dummy_artifacts,
-    ):
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                CONF_URL: "https://fmd.example.com",
-                CONF_ID: "test_user",
-                CONF_PASSWORD: "test_password",
-                "polling_interval": 30,
-                "allow_inaccurate_locations": False,
-                "use_imperial": False,
-            },
-        )
-        await hass.async_block_till_done()
+    mock_auth.return_value = dict(_ARTIFACTS)
+    result2 = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        dict(
+            _BASE_CREDS,
+            polling_interval=30,
+            allow_inaccurate_locations=False,
+            use_imperial=False,
+        ),
+    )
 
     assert result2["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
     assert result2["title"] == "test_user"
+    mock_setup_entry.assert_called_once()
     # Password should NOT be stored; artifacts should be present instead
     assert result2["data"][CONF_URL] == "https://fmd.example.com"
     assert result2["data"][CONF_ID] == "test_user"
@@ -139,173 +178,93 @@ async def test_form(hass: HomeAssistant, mock_fmd_api: AsyncMock) -> None:
     assert result2["data"]["use_imperial"] is False
 
 
-async def test_form_invalid_auth(hass: HomeAssistant) -> None:
-    """Test we handle invalid auth."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
-
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        side_effect=Exception("Authentication failed"),
-    ):
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                CONF_URL: "https://fmd.example.com",
-                CONF_ID: "test_user",
-                CONF_PASSWORD: "wrong_password",
-                "polling_interval": 30,
-            },
-        )
-
-    assert result2["type"] == data_entry_flow.FlowResultType.FORM
-    assert result2["errors"] == {"base": "cannot_connect"}
-
-
-async def test_form_cannot_connect(hass: HomeAssistant) -> None:
-    """Test we handle cannot connect error."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
-
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        side_effect=ConnectionError("Cannot reach server"),
-    ):
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                CONF_URL: "https://invalid.example.com",
-                CONF_ID: "test_user",
-                CONF_PASSWORD: "test_password",
-                "polling_interval": 30,
-            },
-        )
+@pytest.mark.parametrize(
+    "exc",
+    [Exception, ConnectionError, TimeoutError],
+    ids=["invalid_auth", "cannot_connect", "timeout"],
+)
+async def test_form_error_maps_to_cannot_connect(
+    hass: HomeAssistant, exc: type[Exception], mock_auth: AsyncMock
+) -> None:
+    """Test any authentication failure re-shows the form with cannot_connect."""
+    mock_auth.side_effect = exc
+    result2 = await _run_user_flow(hass, dict(_BASE_CREDS, polling_interval=30))
 
     assert result2["type"] == data_entry_flow.FlowResultType.FORM
     assert result2["errors"] == {"base": "cannot_connect"}
 
 
 async def test_form_default_values(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant, mock_setup_entry: AsyncMock, mock_auth: AsyncMock
 ) -> None:
     """Test default values are set correctly."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
-
-    dummy_artifacts = {
-        "base_url": "https://fmd.example.com",
-        "fmd_id": "test_user",
-        "access_token": "mock_access_token",
-        "private_key": "MOCK_KEY",
-        "password_hash": "mock_password_hash",
-        "session_duration": 3600,
-        "token_issued_at": 1234567890.0,
-    }
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        return_value=dummy_artifacts,
-    ):
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                CONF_URL: "https://fmd.example.com",
-                CONF_ID: "test_user",
-                CONF_PASSWORD: "test_password",
-            },
-        )
-        await hass.async_block_till_done()
+    mock_auth.return_value = dict(_ARTIFACTS)
+    result2 = await _run_user_flow(hass, dict(_BASE_CREDS))
 
     assert result2["data"]["polling_interval"] == DEFAULT_POLLING_INTERVAL
     assert result2["data"]["allow_inaccurate_locations"] is False
     assert result2["data"]["use_imperial"] is False
 
 
-async def test_authenticate_api_error(hass: HomeAssistant) -> None:
-    """Test authenticate_and_get_artifacts with API error."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
-    )
-
-    with patch(
-        "custom_components.fmd.config_flow.authenticate_and_get_artifacts",
-        side_effect=TimeoutError("API timeout"),
-    ):
-        result2 = await hass.config_entries.flow.async_configure(
-            result["flow_id"],
-            {
-                CONF_URL: "https://fmd.example.com",
-                CONF_ID: "test_user",
-                CONF_PASSWORD: "test_password",
-                "polling_interval": 30,
-            },
-        )
-
-    assert result2["type"] == data_entry_flow.FlowResultType.FORM
-    assert result2["errors"] == {"base": "cannot_connect"}
-
-
-async def test_authenticate_and_get_artifacts_success(mock_fmd_api: AsyncMock) -> None:
+async def test_authenticate_and_get_artifacts_success(
+    standalone_fmd_client: AsyncMock,
+) -> None:
     """Test authenticate_and_get_artifacts function directly."""
-    # Prepare mock client to return one location then artifacts
-    mock_fmd_api.get_locations = AsyncMock(return_value=[{"lat": 1, "lon": 2}])
-    mock_artifacts = {
-        "base_url": "https://fmd.example.com",
-        "fmd_id": "test_user",
-        "access_token": "mock_access_token",
-        "private_key": "MOCK_KEY",
-        "password_hash": "mock_password_hash",
-        "session_duration": 3600,
-        "token_issued_at": 1234567890.0,
-    }
-    mock_fmd_api.export_auth_artifacts = AsyncMock(return_value=mock_artifacts)
-    mock_fmd_api.close = AsyncMock(return_value=None)
-
     with patch(
-        "custom_components.fmd.config_flow.FmdClient.create", return_value=mock_fmd_api
+        "custom_components.fmd.config_flow.FmdClient.create",
+        return_value=standalone_fmd_client,
     ):
         artifacts = await authenticate_and_get_artifacts(
             "https://fmd.example.com", "test_user", "test_password"
         )
 
-    assert artifacts == mock_artifacts
-    mock_fmd_api.get_locations.assert_called_once_with(1)
-    mock_fmd_api.export_auth_artifacts.assert_called_once()
+    assert artifacts == standalone_fmd_client.export_auth_artifacts.return_value
+    standalone_fmd_client.get_locations.assert_called_once_with(1)
+    standalone_fmd_client.export_auth_artifacts.assert_called_once()
+    standalone_fmd_client.close.assert_awaited_once()
+
+
+class _GetOnlyArtifacts:
+    """Mapping-like artifacts that only implement .get(), like a MagicMock."""
 
+    def get(self, key: str, default: Any = None) -> Any:
+        data = {
+            "base_url": "http://test.url",
+            "fmd_id": "test_id",
+            "access_token": "token",
+            "private_key": "key",
+            "password_hash": "hash",
+            "unrelated": "dropped",
+        }
+        return data.get(key, default)
 
-def test_normalize_artifacts_with_mock_object() -> None:
-    """Test _normalize_artifacts with an object that has .get() but is not a dict."""
 
-    class MockArtifacts:
-        def get(self, key: str, default: Any = None) -> Any:
-            data = {
+@pytest.mark.parametrize(
+    ("artifacts", "expected"),
+    [
+        (
+            _GetOnlyArtifacts(),
+            {
                 "base_url": "http://test.url",
                 "fmd_id": "test_id",
                 "access_token": "token",
                 "private_key": "key",
                 "password_hash": "hash",
-            }
-            return data.get(key, default)
-
-    mock_artifacts = MockArtifacts()
-
-    # Ensure isinstance(mock_artifacts, dict) is False
-    assert not isinstance(mock_artifacts, dict)
-
-    # Call the function
-    result = _normalize_artifacts(mock_artifacts)
-
-    # Verify result is a dict with expected keys
-    assert isinstance(result, dict)
-    assert result["base_url"] == "http://test.url"
-    assert result["fmd_id"] == "test_id"
-    assert result["access_token"] == "token"
-
-
-def test_normalize_artifacts_with_list_of_tuples() -> None:
-    """Test _normalize_artifacts with a list of tuples (convertible to dict)."""
-    artifacts = [("base_url", "http://example.com"), ("fmd_id", "123")]
+            },
+        ),
+        (
+            [("base_url", "http://example.com"), ("fmd_id", "123")],
+            {"base_url": "http://example.com", "fmd_id": "123"},
+        ),
+        ({"a": 1}, {"a": 1}),
+        ([], {}),
+        (None, {}),
+    ],
+    ids=["get_only_object", "list_of_tuples", "dict_passthrough", "empty_list", "none"],
+)
+def test_normalize_artifacts(artifacts: Any, expected: dict[str, Any]) -> None:
+    """_normalize_artifacts always returns a plain dict suitable for entry data."""
     normalized = _normalize_artifacts(artifacts)
-    assert normalized == {"base_url": "http://example.com", "fmd_id": "123"}
+
+    assert type(normalized) is dict
+    assert normalized == expected
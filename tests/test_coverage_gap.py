@@ -1,31 +1,30 @@
 """Test coverage gaps."""
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import os
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fmd_api import AuthenticationError, FmdApiException, OperationError
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 
+from custom_components.fmd.button import _photo_content_hash, _photo_filename
 from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from tests.common import log_contains, picture_blob
 
-pytestmark = pytest.mark.asyncio
 
-
-@pytest.mark.asyncio
 async def test_location_update_generic_exception(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
+    loaded_entry: str,
 ) -> None:
     """Test location update button handles generic exceptions."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Mock request_location to raise a generic Exception
-    mock_fmd_api.create.return_value.request_location.side_effect = Exception(
-        "Generic Error"
-    )
+    loaded_fmd_client.request_location.side_effect = Exception("Generic Error")
 
     # Press the button
     await hass.services.async_call(
@@ -34,20 +33,21 @@ async def test_location_update_generic_exception(
         {"entity_id": "button.fmd_test_user_location_update"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Should have logged error but not raised
     # We can verify the mock was called
-    mock_fmd_api.create.return_value.request_location.assert_called()
+    loaded_fmd_client.request_location.assert_called()
 
 
 async def test_photo_cleanup_deletion_failure(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
+    loaded_entry: str,
+    media_root: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """Test photo cleanup handles deletion failures."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Enable auto cleanup
     await hass.services.async_call(
         "switch",
@@ -64,127 +64,88 @@ async def test_photo_cleanup_deletion_failure(
         blocking=True,
     )
 
-    # Mock get_picture_blobs to return 2 photos (triggering cleanup)
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = [b"1", b"2"]
-
-    # Mock decode_picture
-    mock_photo_result = MagicMock()
-    mock_photo_result.data = b"fake_image_data"
-    mock_photo_result.mime_type = "image/jpeg"
-    mock_photo_result.timestamp = None
-    mock_device.decode_picture.return_value = mock_photo_result
-
-    # Mock Path to simulate existing photos
-    with patch("custom_components.fmd.button.Path") as mock_path:
-        # Setup media dir
-        mock_media_dir = MagicMock()
-        mock_path.return_value.__truediv__.return_value.__truediv__.return_value = (
-            mock_media_dir
-        )
-        mock_media_dir.exists.return_value = True
+    # Two existing photos, photo1 the oldest
+    media_dir = media_root / "fmd" / "test_user"
+    media_dir.mkdir(parents=True)
+    for name, mtime in (("photo1.jpg", 1000), ("photo2.jpg", 2000)):
+        (media_dir / name).write_bytes(b"old")
+        os.utime(media_dir / name, (mtime, mtime))
 
-        # Setup glob to return 2 existing photos
-        photo1 = MagicMock()
-        photo1.stat.return_value.st_mtime = 1000
-        photo1.name = "photo1.jpg"
+    # Downloading one more photo pushes the count over the limit
+    mock_device = loaded_fmd_client.device.return_value
+    mock_device.get_picture_blobs.return_value = [picture_blob(b"fake_image_data")]
 
-        photo2 = MagicMock()
-        photo2.stat.return_value.st_mtime = 2000
-        photo2.name = "photo2.jpg"
+    # Fail deleting the oldest photo only
+    real_unlink = Path.unlink
 
-        mock_media_dir.glob.return_value = [photo1, photo2]
+    def unlink(self: Path, missing_ok: bool = False) -> None:
+        if self.name == "photo1.jpg":
+            raise OSError("Delete failed")
+        real_unlink(self, missing_ok)
 
-        # Mock unlink to raise exception for the first photo (oldest)
-        photo1.unlink.side_effect = Exception("Delete failed")
-
-        # Press download button
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_download_photos"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
-
-        # Verify unlink was called
-        # Note: The actual implementation uses hass.async_add_executor_job(photo.unlink)
-        # We need to ensure that was called.
-        # Since we mocked Path, the photo objects are mocks.
-        # However, async_add_executor_job runs the function in a thread.
-        # If we mock unlink to raise, it should be caught in _cleanup_old_photos
+    monkeypatch.setattr(Path, "unlink", unlink)
 
+    await hass.services.async_call(
+        "button",
+        "press",
+        {"entity_id": "button.fmd_test_user_photo_download"},
+        blocking=True,
+    )
 
-async def test_photo_download_exif_extraction_exception(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test photo download handles EXIF extraction exceptions."""
-    await setup_integration(hass, mock_fmd_api)
+    # The failure is logged and cleanup carries on with the next photo
+    assert log_contains(caplog, "Failed to delete photo photo1.jpg")
+    assert (media_dir / "photo1.jpg").exists()
+    assert not (media_dir / "photo2.jpg").exists()
+    assert len(list(media_dir.glob("*.jpg"))) == 2
 
-    # Mock get_picture_blobs to return 1 photo
-    mock_device = mock_fmd_api.create.return_value.device.return_value
-    mock_device.get_picture_blobs.return_value = [b"1"]
 
-    # Mock decode_picture
-    mock_photo_result = MagicMock()
-    mock_photo_result.data = b"fake_image_data"
-    mock_photo_result.mime_type = "image/jpeg"
-    mock_photo_result.timestamp = None  # Force EXIF path
-    mock_device.decode_picture.return_value = mock_photo_result
+def test_photo_filename_exif_extraction_exception() -> None:
+    """Test photo naming handles EXIF extraction exceptions."""
+    image = b"fake_image_data"
 
-    # Mock Image.open to raise exception
+    # Mock the EXIF reader to raise exception
     with patch(
-        "custom_components.fmd.button.Image.open", side_effect=Exception("Image Error")
+        "custom_components.fmd.button.read_exif_text_tags",
+        side_effect=Exception("Image Error"),
     ):
-        # Press download button
-        await hass.services.async_call(
-            "button",
-            "press",
-            {"entity_id": "button.fmd_test_user_download_photos"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
+        filename = _photo_filename(0, image, OrderedDict())
 
-        # Should have logged warning but continued to save file
-        # We can verify file write was attempted
-        # The code calls hass.async_add_executor_job(filepath.write_bytes, image_bytes)
+    # The photo is still named, with its hash-only name
+    assert filename == f"photo_{_photo_content_hash(image)}.jpg"
 
 
 async def test_device_tracker_set_high_freq_fail(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    mock_request_location_fail: AsyncMock,
+    loaded_entry: str,
 ) -> None:
     """Test device tracker fails to request location when enabling high freq mode."""
-    await setup_integration(hass, mock_fmd_api)
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    tracker = hass.data[DOMAIN][entry_id]["tracker"]
-
-    # Get the client instance
-    client = mock_fmd_api.from_auth_artifacts.return_value
-
-    # Set request_location to fail
-    client.request_location.return_value = False
+    tracker = hass.data[DOMAIN][loaded_entry]["tracker"]
 
     # Enable high frequency mode
     await tracker.set_high_frequency_mode(True)
 
     # Verify request_location was called
-    assert client.request_location.called
+    assert mock_request_location_fail.called
     # And we should have logged a warning (covered by execution)
 
 
+@pytest.mark.parametrize(
+    "switch_id",
+    [
+        "switch.fmd_test_user_high_frequency_mode",
+        "switch.fmd_test_user_location_allow_inaccurate_updates",
+    ],
+    ids=["high_frequency_mode", "allow_inaccurate"],
+)
 async def test_switch_turn_on_off_no_tracker(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    loaded_entry: str,
+    switch_id: str,
 ) -> None:
-    """Test switch turn on/off when tracker is missing."""
-    await setup_integration(hass, mock_fmd_api)
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-
-    # Get the switch
-    switch_id = "switch.fmd_test_user_high_frequency_mode"
-
+    """Test tracker-backed switches turn on/off when the tracker is missing."""
     # Remove tracker from hass.data
-    tracker = hass.data[DOMAIN][entry_id].pop("tracker")
+    tracker = hass.data[DOMAIN][loaded_entry].pop("tracker")
 
     # Turn on switch
     await hass.services.async_call(
@@ -203,54 +164,15 @@ async def test_switch_turn_on_off_no_tracker(
     )
 
     # Restore tracker for cleanup
-    hass.data[DOMAIN][entry_id]["tracker"] = tracker
-
-
-async def test_switch_allow_inaccurate_turn_on_off_no_tracker(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """Test allow inaccurate switch turn on/off when tracker is missing."""
-    await setup_integration(hass, mock_fmd_api)
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-
-    # Get the switch
-    switch_id = "switch.fmd_test_user_location_allow_inaccurate_updates"
-
-    # Remove tracker from hass.data
-    tracker = hass.data[DOMAIN][entry_id].pop("tracker")
-
-    # Turn on switch
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": switch_id},
-        blocking=True,
-    )
-
-    # Turn off switch
-    await hass.services.async_call(
-        "switch",
-        "turn_off",
-        {"entity_id": switch_id},
-        blocking=True,
-    )
-
-    # Restore tracker
-    hass.data[DOMAIN][entry_id]["tracker"] = tracker
+    hass.data[DOMAIN][loaded_entry]["tracker"] = tracker
 
 
 async def test_button_location_update_fail(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant,
+    mock_request_location_fail: AsyncMock,
+    loaded_entry: str,
 ) -> None:
     """Test location update button fails to send request."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Get the client instance
-    client = mock_fmd_api.from_auth_artifacts.return_value
-
-    # Mock request_location to return False
-    client.request_location.return_value = False
-
     button_id = "button.fmd_test_user_location_update"
 
     await hass.services.async_call(
@@ -260,62 +182,40 @@ async def test_button_location_update_fail(
         blocking=True,
     )
 
-    assert client.request_location.called
+    assert mock_request_location_fail.called
 
 
-async def test_button_ring_errors(hass: HomeAssistant, mock_fmd_api: AsyncMock) -> None:
-    """Test ring button error handling."""
-    await setup_integration(hass, mock_fmd_api)
-    button_id = "button.fmd_test_user_volume_ring_device"
+_RING = "button.fmd_test_user_volume_ring_device"
+_REAR_CAMERA = "button.fmd_test_user_photo_capture_rear"
 
-    # Get the client instance
-    client = mock_fmd_api.from_auth_artifacts.return_value
-
-    # Test AuthenticationError
-    client.send_command.side_effect = AuthenticationError("Auth fail")
-    with pytest.raises(HomeAssistantError, match="Authentication failed"):
-        await hass.services.async_call(
-            "button", "press", {"entity_id": button_id}, blocking=True
-        )
-
-    # Test OperationError
-    client.send_command.side_effect = OperationError("Op fail")
-    with pytest.raises(HomeAssistantError, match="Ring command failed"):
-        await hass.services.async_call(
-            "button", "press", {"entity_id": button_id}, blocking=True
-        )
-
-    # Test FmdApiException
-    client.send_command.side_effect = FmdApiException("API fail")
-    with pytest.raises(HomeAssistantError, match="Ring command failed"):
-        await hass.services.async_call(
-            "button", "press", {"entity_id": button_id}, blocking=True
-        )
-
-    # Test HomeAssistantError (direct raise)
-    client.send_command.side_effect = HomeAssistantError("HA fail")
-    with pytest.raises(HomeAssistantError, match="HA fail"):
-        await hass.services.async_call(
-            "button", "press", {"entity_id": button_id}, blocking=True
-        )
+# (button, client method, raised error, expected HomeAssistantError match or None)
+_BUTTON_ERRORS = [
+    (_RING, "send_command", AuthenticationError("Auth fail"), "Authentication failed"),
+    (_RING, "send_command", OperationError("Op fail"), "Ring command failed"),
+    (_RING, "send_command", FmdApiException("API fail"), "Ring command failed"),
+    (_RING, "send_command", HomeAssistantError("HA fail"), "HA fail"),
+    # Camera errors are logged, not raised
+    (_REAR_CAMERA, "take_picture", Exception("Camera fail"), None),
+]
 
 
-async def test_button_rear_camera_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+async def test_button_command_errors(
+    hass: HomeAssistant,
+    loaded_fmd_client: AsyncMock,
+    loaded_entry: str,
 ) -> None:
-    """Test rear camera button error handling."""
-    await setup_integration(hass, mock_fmd_api)
-    button_id = "button.fmd_test_user_photo_capture_rear"
-
-    # Get the client instance
-    client = mock_fmd_api.from_auth_artifacts.return_value
-
-    # Test Exception
-    client.take_picture.side_effect = Exception("Camera fail")
-
-    # Should not raise, just log error
-    await hass.services.async_call(
-        "button", "press", {"entity_id": button_id}, blocking=True
-    )
-
-    assert client.take_picture.called
+    """Test ring and rear camera button error handling on one set-up entry."""
+    for button_id, method, error, match in _BUTTON_ERRORS:
+        case = f"{button_id} / {method} raising {error!r}"
+        client_method = getattr(loaded_fmd_client, method)
+        # Fresh call count per case, so each row proves its own call
+        client_method.reset_mock(side_effect=True)
+        client_method.side_effect = error
+        expectation = (
+            pytest.raises(HomeAssistantError, match=match) if match else nullcontext()
+        )
+        with expectation:
+            await hass.services.async_call(
+                "button", "press", {"entity_id": button_id}, blocking=True
+            )
+        assert client_method.call_count == 1, case
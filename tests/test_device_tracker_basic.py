@@ -1,18 +1,24 @@
 """Test FMD device tracker basic functionality."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from fmd_api import AuthenticationError, FmdApiException, OperationError
 from homeassistant.components.device_tracker import SourceType
 from homeassistant.config_entries import ConfigEntryState
-from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_URL
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from tests.common import (
+    TEST_USER_DATA,
+    TEST_USER_ENTRY,
+    get_entry_data,
+    setup_integration,
+)
 
 
 async def test_device_tracker_setup(
@@ -63,27 +69,14 @@ async def test_device_tracker_location_update(
 async def test_device_tracker_setup_initial_location_fetch_failure(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test device tracker setup handles initial location fetch failures gracefully.
 
     When the initial location fetch fails, the device tracker should still be set up
     but without location data. Platform-level errors should not raise ConfigEntryNotReady.
     """
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-            "allow_inaccurate_locations": False,
-            "use_imperial": False,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
+    config_entry = make_entry(data=TEST_USER_DATA, **TEST_USER_ENTRY)
     config_entry.add_to_hass(hass)
 
     # Mock the API to fail on location fetch
@@ -108,23 +101,10 @@ async def test_device_tracker_setup_initial_location_fetch_failure(
 async def test_device_tracker_setup_initial_location_generic_exception(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test device tracker setup handles generic exception during initial location fetch."""
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-            "allow_inaccurate_locations": False,
-            "use_imperial": False,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
+    config_entry = make_entry(data=TEST_USER_DATA, **TEST_USER_ENTRY)
     config_entry.add_to_hass(hass)
 
     # Mock the API to fail with generic Exception (not FmdApiException etc)
@@ -145,10 +125,6 @@ async def test_device_tracker_config_entry_not_ready(
     hass: HomeAssistant,
 ) -> None:
     """Test ConfigEntryNotReady on FmdClient.create failure."""
-    from unittest.mock import patch
-
-    from homeassistant.config_entries import ConfigEntryState
-    from pytest_homeassistant_custom_component.common import MockConfigEntry
 
     # Mock FmdClient.create to raise an exception
     async def mock_create_error(*args, **kwargs):
@@ -187,7 +163,7 @@ async def test_device_tracker_no_location_data(
     mock_fmd_api.create.return_value.get_locations.return_value = []
 
     # Trigger a manual update by calling the tracker's async_update method
-    tracker = hass.data[DOMAIN][list(hass.data[DOMAIN].keys())[0]]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
     await tracker.async_update()
     tracker.async_write_ha_state()
     await hass.async_block_till_done()
@@ -203,15 +179,13 @@ async def test_device_tracker_authentication_error(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test AuthenticationError raises ConfigEntryAuthFailed."""
-    from fmd_api import AuthenticationError
-
     mock_fmd_api.create.return_value.get_locations.side_effect = AuthenticationError(
         "auth failed"
     )
 
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     with pytest.raises(ConfigEntryAuthFailed):
         await tracker.async_update()
@@ -222,15 +196,13 @@ async def test_device_tracker_operation_error(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test OperationError is handled gracefully."""
-    from fmd_api import OperationError
-
     mock_fmd_api.create.return_value.get_locations.side_effect = OperationError(
         "connection failed"
     )
 
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Should not raise, just log
     await tracker.async_update()
@@ -244,15 +216,13 @@ async def test_device_tracker_fmd_api_error(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test FmdApiException is handled gracefully."""
-    from fmd_api import FmdApiException
-
     mock_fmd_api.create.return_value.get_locations.side_effect = FmdApiException(
         "API failed"
     )
 
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Should not raise, just log
     await tracker.async_update()
@@ -272,7 +242,7 @@ async def test_device_tracker_unexpected_error(
 
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Should not raise, just log
     await tracker.async_update()
@@ -288,8 +258,7 @@ async def test_device_tracker_async_will_remove_from_hass(
     """Test device tracker cleanup when removed from Home Assistant."""
     await setup_integration(hass, mock_fmd_api)
 
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Call async_will_remove_from_hass
     await tracker.async_will_remove_from_hass()
@@ -1,20 +1,30 @@
 """Test FMD device tracker high frequency mode and concurrency."""
 from __future__ import annotations
 
-from datetime import timedelta
+from collections.abc import Awaitable, Callable
+from typing import Any
 from unittest.mock import AsyncMock, patch
 
+import pytest
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.util import dt as dt_util
-from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
-from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from tests.common import get_entry_data, setup_integration, setup_integration_minimal
+
+
+def _poll_callback(tracker: Any) -> Callable[..., Awaitable[None]]:
+    """Restart the tracker's polling and return the interval callback it schedules."""
+    with patch(
+        "custom_components.fmd.device_tracker.async_track_time_interval"
+    ) as mock_track:
+        tracker.start_polling()
+    return mock_track.call_args[0][1]
 
 
 async def test_device_tracker_high_frequency_mode(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
 ) -> None:
     """Test high frequency mode switch."""
     await setup_integration(hass, mock_fmd_api)
@@ -32,19 +42,20 @@ async def test_device_tracker_high_frequency_mode(
 
     # Verify location request is called
     await hass.async_block_till_done()
-    mock_fmd_api.create.return_value.request_location.assert_called()
+    loaded_fmd_client.request_location.assert_called()
 
 
 async def test_device_tracker_high_frequency_mode_success_path(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
 ) -> None:
     """Test high frequency mode success path with location request and sleep."""
     # Mock request_location to return True
-    mock_fmd_api.create.return_value.request_location.return_value = True
+    loaded_fmd_client.request_location.return_value = True
 
     # Mock get_locations for the update after sleep
-    mock_fmd_api.create.return_value.get_locations.return_value = [
+    loaded_fmd_client.get_locations.return_value = [
         {
             "lat": 37.7749,
             "lon": -122.4194,
@@ -63,28 +74,25 @@ async def test_device_tracker_high_frequency_mode_success_path(
         blocking=True,
     )
 
-    await hass.async_block_till_done()
-
     # Verify request_location was called
-    mock_fmd_api.create.return_value.request_location.assert_called()
+    loaded_fmd_client.request_location.assert_called()
 
 
 async def test_device_tracker_high_frequency_error_handling(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
 ) -> None:
     """Test error handling during high frequency poll."""
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high frequency mode manually
     tracker._high_frequency_mode = True
 
     # Mock request_location to raise an exception
-    mock_fmd_api.create.return_value.request_location.side_effect = Exception(
-        "Test Error"
-    )
+    loaded_fmd_client.request_location.side_effect = Exception("Test Error")
 
     # Capture the callback
     with patch(
@@ -102,8 +110,8 @@ async def test_device_tracker_high_frequency_error_handling(
             mock_update.assert_called_once()
 
     # Also test the "else" branch where request_location returns False
-    mock_fmd_api.create.return_value.request_location.side_effect = None
-    mock_fmd_api.create.return_value.request_location.return_value = False
+    loaded_fmd_client.request_location.side_effect = None
+    loaded_fmd_client.request_location.return_value = False
 
     with patch(
         "custom_components.fmd.device_tracker.async_track_time_interval"
@@ -123,7 +131,7 @@ async def test_device_tracker_update_locations_reentrancy(
     """Test update_locations skips if already updating."""
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Manually set _is_updating to True
     tracker._is_updating = True
@@ -148,19 +156,15 @@ async def test_device_tracker_poll_skip_when_already_updating(
     await setup_integration(hass, mock_fmd_api)
 
     # Get the tracker
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Manually set _is_updating to True to simulate ongoing update
     tracker._is_updating = True
 
     # Mock async_update to verify it's not called
     with patch.object(tracker, "async_update") as mock_update:
-        # Advance time to trigger the scheduled poll
-        # The polling interval is 30 minutes by default
-        next_update = dt_util.now() + timedelta(minutes=30)
-        async_fire_time_changed(hass, next_update)
-        await hass.async_block_till_done()
+        # Run the scheduled poll
+        await _poll_callback(tracker)()
 
         # Verify async_update was NOT called
         mock_update.assert_not_called()
@@ -173,32 +177,30 @@ async def test_device_tracker_poll_skip_when_already_updating(
 
 
 async def test_device_tracker_high_frequency_initial_request_returns_false(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog
+    hass: HomeAssistant,
+    mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """High-frequency mode poll with request_location returning False logs warning."""
     await setup_integration(hass, mock_fmd_api)
 
     # Get the tracker
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high-frequency mode first
     await tracker.set_high_frequency_mode(True)
 
     # Mock request_location to return False (failure during poll)
-    mock_fmd_api.create.return_value.request_location.return_value = False
+    loaded_fmd_client.request_location.return_value = False
 
     caplog.clear()
 
-    # Advance time to trigger the scheduled poll
-    # High frequency interval is 5 minutes by default
-    # Add a small buffer to ensure the timer fires
-    next_update = dt_util.now() + timedelta(minutes=5, seconds=1)
-    async_fire_time_changed(hass, next_update)
-    await hass.async_block_till_done()
+    # Run the scheduled high-frequency poll
+    await _poll_callback(tracker)()
 
     # Verify request_location was called
-    mock_fmd_api.create.return_value.request_location.assert_called()
+    loaded_fmd_client.request_location.assert_called()
 
     # Verify warning was logged
     assert any(
@@ -208,31 +210,28 @@ async def test_device_tracker_high_frequency_initial_request_returns_false(
 
 
 async def test_device_tracker_high_frequency_poll_request_failure_logs_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog
+    hass: HomeAssistant,
+    mock_fmd_api: AsyncMock,
+    loaded_fmd_client: AsyncMock,
+    caplog: pytest.LogCaptureFixture,
 ) -> None:
     """During high-frequency polling, request_location failure logs error."""
     await setup_integration(hass, mock_fmd_api)
 
     # Get the tracker
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high-frequency mode first (with successful initial request)
-    mock_fmd_api.create.return_value.request_location.return_value = True
+    loaded_fmd_client.request_location.return_value = True
     await tracker.set_high_frequency_mode(True)
 
     # Now mock request_location to raise exception during poll
-    mock_fmd_api.create.return_value.request_location.side_effect = RuntimeError(
-        "network failure"
-    )
+    loaded_fmd_client.request_location.side_effect = RuntimeError("network failure")
 
     caplog.clear()
 
-    # Advance time to trigger the scheduled poll
-    # Add a small buffer to ensure the timer fires
-    next_update = dt_util.now() + timedelta(minutes=5, seconds=1)
-    async_fire_time_changed(hass, next_update)
-    await hass.async_block_till_done()
+    # Run the scheduled high-frequency poll
+    await _poll_callback(tracker)()
 
     # Verify error was logged
     assert any(
@@ -242,22 +241,20 @@ async def test_device_tracker_high_frequency_poll_request_failure_logs_error(
 
 
 async def test_high_frequency_request_provider_mapping(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant, mock_fmd_api: AsyncMock, loaded_fmd_client: AsyncMock
 ) -> None:
     """When high frequency is enabled, selected provider maps to the API request provider."""
     await setup_integration(hass, mock_fmd_api)
 
     # Get the tracker
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    tracker = hass.data[DOMAIN][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Set the location source to GPS Only (Accurate) so provider should be 'gps'
     hass.states.async_set("select.fmd_test_user_location_source", "GPS Only (Accurate)")
     await hass.async_block_till_done()
 
-    # Patch sleep to avoid waiting and ensure request_location returns True
-    mock_api = mock_fmd_api.create.return_value
-    mock_api.request_location.return_value = True
+    # Ensure request_location returns True
+    loaded_fmd_client.request_location.return_value = True
 
     # Force high frequency mode and patch the async_track_time_interval so the
     # update callback is executed immediately (to exercise provider mapping).
@@ -268,14 +265,14 @@ async def test_high_frequency_request_provider_mapping(
     with patch(
         "custom_components.fmd.device_tracker.async_track_time_interval",
         side_effect=_fake_async_track,
-    ), patch("asyncio.sleep", new=AsyncMock()):
+    ):
         tracker._high_frequency_mode = True
         tracker.start_polling()
         await hass.async_block_till_done()
 
     # request_location should have been called with provider 'gps'
     # Confirm the mock was awaited with provider 'gps' (it may be called multiple times)
-    calls = mock_api.request_location.await_args_list
+    calls = loaded_fmd_client.request_location.await_args_list
     assert any(kwargs.get("provider") == "gps" for _, kwargs in calls)
 
 
@@ -285,8 +282,7 @@ async def test_set_high_frequency_interval_applies_immediately_when_enabled(
     """Updating the high-frequency interval while enabled applies immediately."""
     await setup_integration(hass, mock_fmd_api)
 
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    tracker = hass.data[DOMAIN][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high frequency mode
     tracker._high_frequency_mode = True
@@ -306,8 +302,7 @@ async def test_device_tracker_polling_interval_update(
     """Test device tracker polling interval can be updated."""
     await setup_integration(hass, mock_fmd_api)
 
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Update polling interval
     tracker.set_polling_interval(10)
@@ -324,8 +319,7 @@ async def test_device_tracker_high_frequency_mode_toggle(
     await setup_integration(hass, mock_fmd_api)
 
     # Get the entity and toggle high frequency mode
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high frequency mode
     await tracker.set_high_frequency_mode(True)
@@ -341,12 +335,10 @@ async def test_device_tracker_high_frequency_mode_toggle(
 
 async def test_device_tracker_polling_interval_switch(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    loaded_entry: str,
 ) -> None:
     """Test switching between normal and high-frequency polling intervals."""
-    await setup_integration(hass, mock_fmd_api)
-
-    tracker = hass.data["fmd"]["test_entry_id"]["tracker"]
+    tracker = hass.data["fmd"][loaded_entry]["tracker"]
     # Initial interval should be normal
     assert tracker.polling_interval == tracker._normal_interval
 
@@ -367,7 +359,7 @@ async def test_high_frequency_mode_request_location_error(
     """set_high_frequency_mode handles request_location exceptions."""
     await setup_integration(hass, mock_fmd_api)
 
-    tracker = hass.data["fmd"]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
     # Make API raise during request
     tracker.api.request_location = AsyncMock(side_effect=RuntimeError("boom"))
 
@@ -382,11 +374,14 @@ async def test_device_tracker_high_frequency_interval_boundary(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test high frequency mode with interval at boundary values."""
-    await setup_integration(hass, mock_fmd_api)
+    await setup_integration_minimal(
+        hass,
+        mock_fmd_api,
+        platforms=(Platform.DEVICE_TRACKER, Platform.SWITCH, Platform.NUMBER),
+    )
 
     # Get the tracker
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    tracker = hass.data[DOMAIN][entry_id]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
 
     # Enable high frequency mode
     await hass.services.async_call(
@@ -403,7 +398,6 @@ async def test_device_tracker_high_frequency_interval_boundary(
         {"entity_id": "number.fmd_test_user_high_frequency_interval", "value": 1},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify interval was updated
     assert tracker._high_frequency_interval == 1
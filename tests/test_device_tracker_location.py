@@ -1,14 +1,20 @@
 """Test FMD device tracker location logic."""
 from __future__ import annotations
 
+import json
+from collections.abc import Callable
 from unittest.mock import AsyncMock, patch
 
-from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_URL
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from tests.common import (
+    TEST_USER_DATA,
+    TEST_USER_ENTRY,
+    get_entry_data,
+    setup_integration,
+)
 
 
 def _make_entry(hass: HomeAssistant, data_overrides: dict) -> MockConfigEntry:
@@ -44,8 +50,6 @@ async def test_device_tracker_location_filtering(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test location accuracy filtering."""
-    import json
-
     # Create mock encrypted blobs for two locations
     beacondb_data = {
         "lat": 37.7749,
@@ -127,7 +131,7 @@ async def test_device_tracker_inaccurate_location_filtering_enabled(
     ]
 
     # Trigger an update and verify it doesn't change (stays at previous location)
-    tracker = hass.data[DOMAIN][list(hass.data[DOMAIN].keys())[0]]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
     await tracker.async_update()
     tracker.async_write_ha_state()
     await hass.async_block_till_done()
@@ -161,7 +165,7 @@ async def test_device_tracker_inaccurate_locations_warning(
     await setup_integration(hass, mock_fmd_api)
 
     # Force an update
-    tracker = hass.data[DOMAIN]["test_entry_id"]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
     await tracker.async_update()
 
     # Verify location was not updated (stayed None)
@@ -276,23 +280,12 @@ async def test_allow_inaccurate_true_uses_first_location_update(
 async def test_device_tracker_imperial_units(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test imperial unit conversion."""
     # Create config entry with imperial units enabled
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-            "allow_inaccurate_locations": False,
-            "use_imperial": True,  # Enable imperial units
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
+    config_entry = make_entry(
+        data={**TEST_USER_DATA, "use_imperial": True}, **TEST_USER_ENTRY
     )
     config_entry.add_to_hass(hass)
 
@@ -326,6 +319,7 @@ async def test_device_tracker_imperial_units(
 async def test_device_tracker_imperial_altitude_speed(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test device tracker with altitude and speed attributes in imperial."""
     mock_fmd_api.create.return_value.get_locations.return_value = [
@@ -342,20 +336,8 @@ async def test_device_tracker_imperial_altitude_speed(
     ]
 
     # Setup with imperial units
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-            "allow_inaccurate_locations": False,
-            "use_imperial": True,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
+    config_entry = make_entry(
+        data={**TEST_USER_DATA, "use_imperial": True}, **TEST_USER_ENTRY
     )
     config_entry.add_to_hass(hass)
 
@@ -492,10 +474,7 @@ async def test_empty_blob_warning_then_next_blob_used(
     await setup_integration(hass, mock_fmd_api)
 
     # Get the tracker
-    entry_id = list(hass.data["fmd"].keys())[0]
-    tracker = hass.data["fmd"][entry_id]["tracker"]
-
-    import json
+    tracker = get_entry_data(hass)["tracker"]
 
     # First blob is empty, second is valid JSON string
     valid_blob = json.dumps(
@@ -561,7 +540,7 @@ async def test_device_tracker_location_provider_types(
             "accuracy": 15.0,
         }
     ]
-    tracker = hass.data[DOMAIN][list(hass.data[DOMAIN].keys())[0]]["tracker"]
+    tracker = get_entry_data(hass)["tracker"]
     await tracker.async_update()
     assert tracker.latitude == 37.7749
 
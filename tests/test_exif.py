@@ -0,0 +1,105 @@
+"""Test the minimal EXIF reader."""
+from __future__ import annotations
+
+import io
+import struct
+
+import pytest
+from PIL import Image
+
+from custom_components.fmd.exif import read_exif_text_tags
+
+_IFD0_TAGS = {"DateTime": 306, "Make": 271}
+_EXIF_IFD_TAGS = {"DateTimeOriginal": 36867, "DateTimeDigitized": 36868}
+
+
+def _jpeg_with_exif(**tags: str) -> bytes:
+    """Encode a small JPEG with the given tags in IFD0 or the Exif IFD."""
+    exif = Image.Exif()
+    exif_ifd = exif.get_ifd(0x8769)
+    for name, value in tags.items():
+        if name in _IFD0_TAGS:
+            exif[_IFD0_TAGS[name]] = value
+        else:
+            exif_ifd[_EXIF_IFD_TAGS[name]] = value
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), color="red").save(buf, format="JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def _big_endian_jpeg(tag: int, value: bytes) -> bytes:
+    """Hand-build a Motorola-order EXIF JPEG with one ASCII tag in IFD0."""
+    value += b"\x00"
+    entry = struct.pack(">HHI", tag, 2, len(value))
+    if len(value) <= 4:
+        entry += value.ljust(4, b"\x00")
+        tail = b""
+    else:
+        entry += struct.pack(">I", 8 + 2 + 12 + 4)
+        tail = value
+    tiff = b"MM\x00\x2a" + struct.pack(">I", 8) + struct.pack(">H", 1) + entry
+    tiff += b"\x00\x00\x00\x00" + tail
+    app1 = b"Exif\x00\x00" + tiff
+    return b"\xff\xd8\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\xff\xd9"
+
+
+def test_reads_ifd0_and_exif_ifd_tags() -> None:
+    """DateTime comes from IFD0, DateTimeOriginal/Digitized from the Exif IFD."""
+    data = _jpeg_with_exif(
+        DateTime="2025:03:10 09:45:12",
+        DateTimeOriginal="2025:01:15 10:30:45",
+        DateTimeDigitized="2025:01:16 11:00:00",
+    )
+
+    tags = read_exif_text_tags(data)
+
+    assert tags is not None
+    assert tags[306] == "2025:03:10 09:45:12"
+    assert tags[36867] == "2025:01:15 10:30:45"
+    assert tags[36868] == "2025:01:16 11:00:00"
+
+
+def test_exif_without_datetime_tags() -> None:
+    """EXIF with only unrelated text tags yields those tags and no timestamps."""
+    tags = read_exif_text_tags(_jpeg_with_exif(Make="FMD"))
+
+    assert tags == {271: "FMD"}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(b"2025:04:05 16:20:30", "2025:04:05 16:20:30"), (b"ab", "ab")],
+    ids=["offset_value", "inline_value"],
+)
+def test_big_endian_ascii_tag(value: bytes, expected: str) -> None:
+    """Motorola byte order and values stored inline in the entry are handled."""
+    assert read_exif_text_tags(_big_endian_jpeg(306, value)) == {306: expected}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"not_a_real_image", b"", b"\xff\xd8\xff\xda\x00\x02"],
+    ids=["not_jpeg", "empty", "no_app1_before_scan"],
+)
+def test_no_exif_returns_none(data: bytes) -> None:
+    """Non-JPEG data and JPEGs without an EXIF segment return None."""
+    assert read_exif_text_tags(data) is None
+
+
+def test_plain_jpeg_returns_none() -> None:
+    """A JPEG encoded without EXIF has no EXIF segment."""
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="JPEG")
+
+    assert read_exif_text_tags(buf.getvalue()) is None
+
+
+def test_truncated_exif_raises() -> None:
+    """A cut-off IFD raises instead of returning partial garbage."""
+    data = _big_endian_jpeg(306, b"2025:04:05 16:20:30")
+    truncated = data[:20]
+    # Keep the APP1 length consistent with the truncated payload
+    truncated = truncated[:4] + struct.pack(">H", len(truncated) - 4) + truncated[6:]
+
+    with pytest.raises(struct.error):
+        read_exif_text_tags(truncated)
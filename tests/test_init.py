@@ -1,6 +1,7 @@
 """Test FMD integration setup and initialization."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -11,28 +12,16 @@ from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fmd.const import DOMAIN
+from tests.common import TEST_USER_DATA, TEST_USER_ENTRY, setup_integration
 
 
 async def test_setup_entry(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test setting up the integration."""
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-            "allow_inaccurate_locations": False,
-            "use_imperial": False,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
+    config_entry = make_entry(data=TEST_USER_DATA, **TEST_USER_ENTRY)
     config_entry.add_to_hass(hass)
 
     with patch("custom_components.fmd.FmdClient", mock_fmd_api):
@@ -49,21 +38,10 @@ async def test_setup_entry(
 async def test_unload_entry(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test unloading the integration."""
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
+    config_entry = make_entry(data=TEST_USER_DATA, **TEST_USER_ENTRY)
     config_entry.add_to_hass(hass)
 
     with patch("custom_components.fmd.FmdClient", mock_fmd_api):
@@ -78,20 +56,11 @@ async def test_unload_entry(
 
 async def test_setup_entry_api_failure(
     hass: HomeAssistant,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test setup fails when API creation fails."""
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "wrong_password",
-            "polling_interval": 30,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
+    config_entry = make_entry(
+        data={**TEST_USER_DATA, CONF_PASSWORD: "wrong_password"}, **TEST_USER_ENTRY
     )
     config_entry.add_to_hass(hass)
 
@@ -107,21 +76,10 @@ async def test_setup_entry_api_failure(
 
 async def test_setup_entry_network_error_raises_config_entry_not_ready(
     hass: HomeAssistant,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test that network errors during API creation raise ConfigEntryNotReady."""
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-            "polling_interval": 30,
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
+    config_entry = make_entry(data=TEST_USER_DATA, **TEST_USER_ENTRY)
     config_entry.add_to_hass(hass)
 
     # Simulate network timeout
@@ -250,7 +208,6 @@ async def test_artifact_export_failure_during_password_migration_logs_warning(
     mock_device = AsyncMock()
     mock_device.wipe = AsyncMock()
     mock_device.lock = AsyncMock()
-    mock_device.decode_picture = AsyncMock()
     mock_device.get_picture_blobs = AsyncMock(return_value=[])
     device_class_mock = MagicMock(return_value=mock_device)
 
@@ -321,7 +278,6 @@ async def test_artifact_export_generic_exception_during_migration(
     mock_device = AsyncMock()
     mock_device.wipe = AsyncMock()
     mock_device.lock = AsyncMock()
-    mock_device.decode_picture = AsyncMock()
     mock_device.get_picture_blobs = AsyncMock(return_value=[])
     device_class_mock = MagicMock(return_value=mock_device)
 
@@ -545,8 +501,6 @@ async def test_config_entry_unload_cleans_up_entities_and_data(
     mock_fmd_api: AsyncMock,
 ) -> None:
     """Test unloading a config entry cleans up entities and hass.data."""
-    from tests.common import setup_integration
-
     await setup_integration(hass, mock_fmd_api)
 
     entry = hass.config_entries.async_entries("fmd")[0]
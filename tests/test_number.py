@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock
 
 from homeassistant.core import HomeAssistant
 
-from tests.common import setup_integration
+from tests.common import get_entry_data, setup_integration
 
 
 async def test_update_interval_number(
@@ -147,7 +147,7 @@ async def test_update_interval_set_value_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Simulate tracker being removed from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     entity_id = "number.fmd_test_user_update_interval"
 
@@ -172,7 +172,7 @@ async def test_high_frequency_interval_set_value_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Simulate tracker being removed from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     entity_id = "number.fmd_test_user_high_frequency_interval"
 
@@ -1,10 +1,14 @@
 """Test FMD select entities."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from unittest.mock import AsyncMock
 
+import pytest
 from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.fmd.select import FmdLocationSourceSelect
 from tests.common import setup_integration
 
 
@@ -201,73 +205,29 @@ async def test_ringer_mode_normal(
     mock_fmd_api.create.return_value.set_ringer_mode.assert_called_once_with("normal")
 
 
-async def test_bluetooth_command_tracker_not_found(
+@pytest.mark.parametrize(
+    ("entity_id", "option"),
+    [
+        ("select.fmd_test_user_bluetooth", "Enable Bluetooth"),
+        ("select.fmd_test_user_volume_do_not_disturb", "Enable Do Not Disturb"),
+        ("select.fmd_test_user_volume_ringer_mode", "Silent"),
+    ],
+    ids=["bluetooth", "dnd", "ringer_mode"],
+)
+async def test_command_select_tracker_not_found(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test bluetooth command when tracker is not found."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Remove tracker from hass.data to simulate it not being found
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
-
-    entity_id = "select.fmd_test_user_bluetooth"
-
-    # Try to enable bluetooth - should handle gracefully
-    await hass.services.async_call(
-        "select",
-        "select_option",
-        {"entity_id": entity_id, "option": "Enable Bluetooth"},
-        blocking=True,
-    )
-
-    # Should remain in placeholder state since tracker not found
-    state = hass.states.get(entity_id)
-    assert state is not None
-
-
-async def test_dnd_command_tracker_not_found(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
-) -> None:
-    """Test DND command when tracker is not found."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Remove tracker from hass.data to simulate it not being found
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
-
-    entity_id = "select.fmd_test_user_volume_do_not_disturb"
-
-    # Try to enable DND - should handle gracefully
-    await hass.services.async_call(
-        "select",
-        "select_option",
-        {"entity_id": entity_id, "option": "Enable Do Not Disturb"},
-        blocking=True,
-    )
-
-    # Should remain in placeholder state since tracker not found
-    state = hass.states.get(entity_id)
-    assert state is not None
-
-
-async def test_ringer_mode_command_tracker_not_found(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    loaded_entry: str,
+    entity_id: str,
+    option: str,
 ) -> None:
-    """Test ringer mode command when tracker is not found."""
-    await setup_integration(hass, mock_fmd_api)
-
+    """Test command selects handle a missing tracker gracefully."""
     # Remove tracker from hass.data to simulate it not being found
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    hass.data["fmd"][loaded_entry].pop("tracker", None)
 
-    entity_id = "select.fmd_test_user_volume_ringer_mode"
-
-    # Try to set ringer mode - should handle gracefully
     await hass.services.async_call(
         "select",
         "select_option",
-        {"entity_id": entity_id, "option": "Silent"},
+        {"entity_id": entity_id, "option": option},
         blocking=True,
     )
 
@@ -374,7 +334,6 @@ async def test_select_placeholder_option(
         },
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Select placeholder option for DND (should do nothing)
     await hass.services.async_call(
@@ -386,7 +345,6 @@ async def test_select_placeholder_option(
         },
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Select placeholder option for ringer mode (should do nothing)
     await hass.services.async_call(
@@ -398,7 +356,6 @@ async def test_select_placeholder_option(
         },
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify API was NOT called
     mock_fmd_api.create.return_value.set_bluetooth.assert_not_called()
@@ -408,35 +365,12 @@ async def test_select_placeholder_option(
 
 async def test_location_source_invalid_option_fallback(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
 ) -> None:
     """Test location source returns 'all' for invalid/unmapped options."""
-    # Unit-style test of the mapping logic via the public method
-    from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_URL
-    from pytest_homeassistant_custom_component.common import MockConfigEntry
-
-    from custom_components.fmd.const import DOMAIN
-    from custom_components.fmd.select import FmdLocationSourceSelect
-
-    # Minimal config entry for constructing the entity
-    config_entry = MockConfigEntry(
-        version=1,
-        domain=DOMAIN,
-        title="test_user",
-        data={
-            CONF_URL: "https://fmd.example.com",
-            CONF_ID: "test_user",
-            CONF_PASSWORD: "test_password",
-        },
-        entry_id="test_entry_id",
-        unique_id="test_user",
-    )
-    config_entry.add_to_hass(hass)
-
-    # Instantiate select and set an invalid option
-    location_source = FmdLocationSourceSelect(hass, config_entry)
+    # Unit-style test of the mapping logic; the entity needs no registered entry
+    location_source = FmdLocationSourceSelect(hass, make_entry())
     location_source._attr_current_option = "Invalid Option Not In Map"
 
     # Public API should fallback to "all"
-    provider = location_source.get_provider_value()
-    assert provider == "all"
+    assert location_source.get_provider_value() == "all"
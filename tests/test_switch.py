@@ -2,13 +2,27 @@
 from __future__ import annotations
 
 import asyncio
-from unittest.mock import AsyncMock
+from collections.abc import Callable
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
 
+import pytest
 from homeassistant.const import STATE_OFF, STATE_ON
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from custom_components.fmd.switch import WIPE_SAFETY_TIMEOUT, FmdWipeSafetySwitch
+from tests.common import get_entry_data, setup_integration
+
+
+async def _cancel_and_wait(task: asyncio.Task) -> None:
+    """Cancel task and wait for it to finish without raising CancelledError."""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
 
 
 async def test_high_frequency_mode_switch(
@@ -166,7 +180,6 @@ async def test_wipe_safety_auto_timeout(
         {"entity_id": "button.fmd_test_user_wipe_execute"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Safety switch should turn off after successful wipe
     state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
@@ -181,7 +194,7 @@ async def test_high_frequency_mode_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     entity_id = "switch.fmd_test_user_high_frequency_mode"
 
@@ -205,7 +218,7 @@ async def test_allow_inaccurate_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass.data
-    hass.data["fmd"][list(hass.data["fmd"].keys())[0]].pop("tracker", None)
+    get_entry_data(hass).pop("tracker", None)
 
     entity_id = "switch.fmd_test_user_location_allow_inaccurate_updates"
 
@@ -237,7 +250,6 @@ async def test_high_frequency_mode_api_error(
         {"entity_id": entity_id},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # State should be updated to ON
     state = hass.states.get(entity_id)
@@ -250,7 +262,6 @@ async def test_high_frequency_mode_api_error(
         {"entity_id": entity_id},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # State should be updated to OFF
     state = hass.states.get(entity_id)
@@ -297,8 +308,7 @@ async def test_switch_wipe_safety_tracker_not_found(
     await setup_integration(hass, mock_fmd_api)
 
     # Remove tracker from hass data
-    entry_id = list(hass.data["fmd"].keys())[0]
-    hass.data["fmd"][entry_id]["tracker"] = None
+    get_entry_data(hass)["tracker"] = None
 
     # Turn on the wipe safety switch (should still work, just logs differently)
     await hass.services.async_call(
@@ -307,95 +317,87 @@ async def test_switch_wipe_safety_tracker_not_found(
         {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
         blocking=True,
     )
-    await hass.async_block_till_done()
 
     # Verify it's on
     state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
     assert state.state == "on"
 
 
-async def test_switch_wipe_safety_auto_disable_task_cancellation(
+@pytest.fixture
+def wipe_safety_switch(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    make_entry: Callable[..., MockConfigEntry],
+    monkeypatch: pytest.MonkeyPatch,
+) -> FmdWipeSafetySwitch:
+    """Standalone wipe safety switch, not added to any platform."""
+    switch = FmdWipeSafetySwitch(hass, make_entry())
+    monkeypatch.setattr(switch, "async_write_ha_state", MagicMock())
+    return switch
+
+
+async def test_switch_wipe_safety_auto_disable_cancelled_error(
+    wipe_safety_switch: FmdWipeSafetySwitch,
 ) -> None:
-    """Test wipe safety auto-disable task cancellation."""
-    await setup_integration(hass, mock_fmd_api)
+    """Test cancelling a pending auto-disable propagates and leaves safety on."""
+    wipe_safety_switch._attr_is_on = True
+    task = asyncio.create_task(wipe_safety_switch._auto_disable())
+    wipe_safety_switch._auto_disable_task = task
+    # Let the task reach its sleep before cancelling it
+    await asyncio.sleep(0)
 
-    # Turn on the wipe safety (starts auto-disable task)
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    await _cancel_and_wait(task)
+
+    assert task.cancelled()
+    assert wipe_safety_switch.is_on is True
+    wipe_safety_switch.async_write_ha_state.assert_not_called()
 
-    # Get the switch entity
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    safety_switch = hass.data[DOMAIN][entry_id]["wipe_safety_switch"]
+
+async def test_switch_wipe_safety_auto_disable_task_cancellation(
+    wipe_safety_switch: FmdWipeSafetySwitch,
+) -> None:
+    """Test wipe safety auto-disable task cancellation."""
+    # Turn on the wipe safety (starts auto-disable task)
+    await wipe_safety_switch.async_turn_on()
 
     # Verify task was created
-    task = safety_switch._auto_disable_task
+    task = wipe_safety_switch._auto_disable_task
     assert task is not None
 
     # Turn off the switch (cancels the task - this hits the except CancelledError block)
-    await hass.services.async_call(
-        "switch",
-        "turn_off",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    await wipe_safety_switch.async_turn_off()
 
-    # Wait for the task to handle the cancellation
-    try:
-        await task
-    except asyncio.CancelledError:
-        # Task cancellation is expected here
-        pass
+    # One loop iteration lets the task handle the cancellation async_turn_off requested
+    await asyncio.sleep(0)
 
     # Task should be cancelled and set to None
-    assert safety_switch._auto_disable_task is None
-    assert safety_switch.is_on is False
+    assert task.cancelled()
+    assert wipe_safety_switch._auto_disable_task is None
+    assert wipe_safety_switch.is_on is False
 
 
 async def test_switch_wipe_safety_turn_on_while_running(
-    hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    wipe_safety_switch: FmdWipeSafetySwitch,
 ) -> None:
     """Test turning on wipe safety switch while it is already running."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Turn on the wipe safety (starts auto-disable task)
-    await hass.services.async_call(
-        "switch",
-        "turn_on",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
-
-    # Get the switch entity
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    safety_switch = hass.data[DOMAIN][entry_id]["wipe_safety_switch"]
+    await wipe_safety_switch.async_turn_on()
 
     # Verify task was created
-    task1 = safety_switch._auto_disable_task
+    task1 = wipe_safety_switch._auto_disable_task
     assert task1 is not None
 
-    # Turn on the switch AGAIN - call directly to bypass HA state check
-    await safety_switch.async_turn_on()
+    # Turn on the switch AGAIN
+    await wipe_safety_switch.async_turn_on()
 
     # Verify the old task was cancelled and a new one created
-    task2 = safety_switch._auto_disable_task
+    task2 = wipe_safety_switch._auto_disable_task
     assert task2 is not None
     assert task1 is not task2
     assert task1.cancelled()
 
     # Cleanup: Turn off
-    await hass.services.async_call(
-        "switch",
-        "turn_off",
-        {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-        blocking=True,
-    )
+    await wipe_safety_switch.async_turn_off()
+    await _cancel_and_wait(task2)
 
 
 async def test_switch_multiple_toggles(
@@ -413,7 +415,6 @@ async def test_switch_multiple_toggles(
             {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
             blocking=True,
         )
-        await hass.async_block_till_done()
 
         await hass.services.async_call(
             "switch",
@@ -421,7 +422,6 @@ async def test_switch_multiple_toggles(
             {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
             blocking=True,
         )
-        await hass.async_block_till_done()
 
     # Final state should be off
     state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
@@ -431,11 +431,9 @@ async def test_switch_multiple_toggles(
 
 async def test_photo_auto_cleanup_switch_toggle_and_persistence(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    loaded_entry: str,
 ) -> None:
     """Test toggling photo auto-cleanup switch and persistence."""
-    await setup_integration(hass, mock_fmd_api)
-
     entity_id = "switch.fmd_test_user_photo_auto_cleanup"
     # Turn on
     await hass.services.async_call(
@@ -444,7 +442,6 @@ async def test_photo_auto_cleanup_switch_toggle_and_persistence(
         {"entity_id": entity_id},
         blocking=True,
     )
-    await hass.async_block_till_done()
     state = hass.states.get(entity_id)
     assert state.state == "on"
 
@@ -455,7 +452,6 @@ async def test_photo_auto_cleanup_switch_toggle_and_persistence(
         {"entity_id": entity_id},
         blocking=True,
     )
-    await hass.async_block_till_done()
     state = hass.states.get(entity_id)
     assert state.state == "off"
 
@@ -468,33 +464,27 @@ async def test_wipe_safety_switch_auto_disables_after_timeout(
     hass: HomeAssistant,
     mock_fmd_api: AsyncMock,
 ) -> None:
-    """Patch timeout to zero and verify auto-disable executes and turns switch off."""
-    from unittest.mock import patch
-
+    """Advance the loop clock past the timeout and verify auto-disable turns it off."""
     await setup_integration(hass, mock_fmd_api)
+    entity_id = "switch.fmd_test_user_wipe_safety_switch"
 
-    with patch("custom_components.fmd.switch.WIPE_SAFETY_TIMEOUT", 0), patch(
-        "asyncio.sleep", new=AsyncMock()
-    ):
-        # Turn on
-        await hass.services.async_call(
-            "switch",
-            "turn_on",
-            {"entity_id": "switch.fmd_test_user_wipe_safety_switch"},
-            blocking=True,
-        )
-        await hass.async_block_till_done()
-
-        # Await the auto-disable task to completion
-        entry_id = list(hass.data[DOMAIN].keys())[0]
-        switch = hass.data[DOMAIN][entry_id]["wipe_safety_switch"]
-        if switch._auto_disable_task:
-            try:
-                await switch._auto_disable_task
-            except asyncio.CancelledError:
-                # Task cancellation is expected here
-                pass
-
-    # After auto-disable, state should be off
-    state = hass.states.get("switch.fmd_test_user_wipe_safety_switch")
-    assert state is not None and state.state == "off"
+    await hass.services.async_call(
+        "switch", "turn_on", {"entity_id": entity_id}, blocking=True
+    )
+
+    # Just before the timeout the safety is still armed
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=WIPE_SAFETY_TIMEOUT - 1)
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == STATE_ON
+
+    # Firing past the timeout runs the pending asyncio.sleep wake-up immediately
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=WIPE_SAFETY_TIMEOUT + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == STATE_OFF
+    switch = hass.data["switch"].get_entity(entity_id)
+    assert switch._auto_disable_task is None
@@ -1,42 +1,52 @@
 """Test FMD text entities."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from typing import Any
 from unittest.mock import AsyncMock
 
 import pytest
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.fmd.const import DOMAIN
-from tests.common import setup_integration
+from custom_components.fmd.text import FmdWipePinText
+from tests.common import get_entry_data, setup_integration_minimal
 
 
-async def test_wipe_pin_validation_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
-    """Test wipe PIN validation errors."""
-    await setup_integration(hass, mock_fmd_api)
+@pytest.fixture
+async def entry_data(hass: HomeAssistant, mock_fmd_api: AsyncMock) -> dict[str, Any]:
+    """Set up only the text platform and return the entry store."""
+    await setup_integration_minimal(hass, mock_fmd_api, platforms=(Platform.TEXT,))
+    return get_entry_data(hass)
 
-    # Get the entity instance
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    entity = hass.data[DOMAIN][entry_id]["wipe_pin_text"]
 
+@pytest.fixture
+def wipe_pin_text(
+    hass: HomeAssistant, make_entry: Callable[..., MockConfigEntry]
+) -> FmdWipePinText:
+    """Standalone wipe PIN entity for validation that fails before any state write."""
+    return FmdWipePinText(hass, make_entry())
+
+
+async def test_wipe_pin_validation_error(wipe_pin_text: FmdWipePinText) -> None:
+    """Test wipe PIN validation errors."""
     # Test non-alphanumeric
     with pytest.raises(ValueError) as excinfo:
-        await entity.async_set_value("1234!")
+        await wipe_pin_text.async_set_value("1234!")
     assert "alphanumeric" in str(excinfo.value)
 
     # Test non-ASCII
     with pytest.raises(ValueError) as excinfo:
-        await entity.async_set_value("café")
+        await wipe_pin_text.async_set_value("café")
     assert "ASCII" in str(excinfo.value)
 
 
 async def test_wipe_pin_short_warning(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock, caplog: pytest.LogCaptureFixture
+    hass: HomeAssistant, entry_data: dict[str, Any], caplog: pytest.LogCaptureFixture
 ) -> None:
     """Test warning for short wipe PIN."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Set short PIN
     await hass.services.async_call(
         "text",
@@ -50,14 +60,11 @@ async def test_wipe_pin_short_warning(
 
 
 async def test_lock_message_update(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
+    hass: HomeAssistant, entry_data: dict[str, Any]
 ) -> None:
     """Test lock message update."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Get the entity instance
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    entity = hass.data[DOMAIN][entry_id]["lock_message_text"]
+    entity = entry_data["lock_message_text"]
 
     # Update value
     await entity.async_set_value("Return to owner")
@@ -72,29 +79,19 @@ async def test_lock_message_update(
     assert entry.data["lock_message_native_value"] == "Return to owner"
 
 
-async def test_wipe_pin_empty_error(
-    hass: HomeAssistant, mock_fmd_api: AsyncMock
-) -> None:
+async def test_wipe_pin_empty_error(wipe_pin_text: FmdWipePinText) -> None:
     """Test wipe PIN empty error."""
-    await setup_integration(hass, mock_fmd_api)
-
-    # Get the entity instance
-    entry_id = list(hass.data[DOMAIN].keys())[0]
-    entity = hass.data[DOMAIN][entry_id]["wipe_pin_text"]
-
     # Test empty PIN
     with pytest.raises(ValueError) as excinfo:
-        await entity.async_set_value("")
+        await wipe_pin_text.async_set_value("")
     assert "PIN cannot be empty" in str(excinfo.value)
 
 
 async def test_wipe_pin_with_spaces_validation(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    entry_data: dict[str, Any],
 ) -> None:
     """Test wipe PIN validation with spaces."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Try to set PIN with spaces - gets caught by alphanumeric check
     with pytest.raises(ValueError, match="alphanumeric"):
         await hass.services.async_call(
@@ -107,11 +104,9 @@ async def test_wipe_pin_with_spaces_validation(
 
 async def test_lock_message_empty_validation(
     hass: HomeAssistant,
-    mock_fmd_api: AsyncMock,
+    entry_data: dict[str, Any],
 ) -> None:
     """Test lock message validation allows empty."""
-    await setup_integration(hass, mock_fmd_api)
-
     # Empty message should be allowed
     await hass.services.async_call(
         "text",